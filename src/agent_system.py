@@ -0,0 +1,233 @@
+import numpy as np
+import pygame
+
+# NPC state, stored as parallel NumPy arrays (one row per agent slot) so that movement,
+# distance tests and culling run as batch operations. AGENT objects are thin views onto a slot.
+
+STATE_FREE = 0  # Slot not in use
+STATE_WANDER = 1
+STATE_IDLE = 2  # Player is close by, stand still so they can be clicked
+STATE_TALKING = 3
+
+profession_ids = {}  # name -> id
+profession_colors = []  # id -> colour used when drawing
+
+def register_profession(name, color):
+    """Add a profession and the colour its agents are drawn with; returns its id."""
+    if name not in profession_ids:
+        profession_ids[name] = len(profession_colors)
+        profession_colors.append(pygame.Color(color))
+    return profession_ids[name]
+
+def profession_id(name):
+    """Return the id for a profession, registering unknown ones with the default colour."""
+    if name not in profession_ids:
+        register_profession(name, "green")
+    return profession_ids[name]
+
+register_profession("none", "green")
+register_profession("shopkeeper", "blue")
+register_profession("beggar", pygame.Color(255, 255, 255, 255))
+
+class SpriteAtlas:
+    """Pre-rendered circles for NPCs (per profession, state and radius) and players.
+
+    Drawing a crowd is then a single Surface.blits of cached surfaces instead of rasterizing
+    a circle per agent per frame.
+    """
+    colorkey = (255, 0, 255)
+    talking_outline = pygame.Color("yellow")  # Ring around NPCs in a conversation
+
+    def __init__(self):
+        self.sprites = {}  # (radius << 16 | profession id << 8 | state) -> Surface
+        self._circles = {}  # (rgba, radius, outline rgba) -> Surface
+
+    def circle(self, color, radius, outline=None):
+        """A circle centred at (radius, radius); blit it at the centre minus the radius."""
+        color = pygame.Color(color)
+        key = (tuple(color), radius, None if outline is None else tuple(outline))
+        sprite = self._circles.get(key)
+        if sprite is None:
+            sprite = pygame.Surface((2 * radius, 2 * radius))
+            used = {tuple(pygame.Color(c))[:3] for c in (color, outline) if c is not None}
+            colorkey = self.colorkey if self.colorkey not in used else (0, 0, 1)
+            sprite.fill(colorkey)
+            pygame.draw.circle(sprite, color, (radius, radius), radius)
+            if outline is not None:
+                pygame.draw.circle(sprite, outline, (radius, radius), radius, 2)
+            if pygame.display.get_surface() is not None:
+                sprite = sprite.convert()  # Match the display format so blits don't convert per pixel
+            sprite.set_colorkey(colorkey)
+            self._circles[key] = sprite
+        return sprite
+
+    def agent_sprite(self, key):
+        sprite = self.sprites.get(key)
+        if sprite is None:
+            radius, profession, state = key >> 16, (key >> 8) & 0xFF, key & 0xFF
+            outline = self.talking_outline if state == STATE_TALKING else None
+            sprite = self.sprites[key] = self.circle(profession_colors[profession], radius, outline)
+        return sprite
+
+sprite_atlas = SpriteAtlas()
+
+class AgentSystem:
+    """Structure-of-arrays store for every loaded NPC."""
+    def __init__(self, capacity=256, seed=0, tile_size=(50, 50), cell_size=100):
+        self.tile_size = tile_size
+        self.cell_size = cell_size  # Must match the AgentIndex cell size
+        self.wander_speed = 20  # Pixels per second
+        self.wander_interval = (1.0, 4.0)  # Seconds between new wander targets
+        self.margin = 12  # Keep agents this far inside their home tile
+        self.rng = np.random.default_rng(seed)
+
+        self.count = 0  # High-water mark of used slots
+        self.capacity = 0
+        self.free_slots = []
+        self.views = []  # slot -> AGENT (or None)
+        self._allocate(capacity)
+
+    # (name, columns, dtype, fill) of every per-agent array
+    fields = [
+        ("positions", 2, np.float32, 0),
+        ("targets", 2, np.float32, 0),  # Current wander target
+        ("home_min", 2, np.float32, 0),  # Wander bounds: the agent's spawn tile minus the margin
+        ("home_max", 2, np.float32, 0),
+        ("detection", 1, np.float32, 0),
+        ("radius", 1, np.float32, 0),
+        ("profession", 1, np.uint8, 0),
+        ("state", 1, np.uint8, STATE_FREE),
+        ("timers", 1, np.float32, 0),  # Seconds until the next wander target
+        ("cells", 2, np.int32, 0),  # Spatial-hash cell the agent was last indexed in
+    ]
+
+    def _allocate(self, capacity):
+        """Grow every array to `capacity` rows, keeping existing data."""
+        for name, columns, dtype, fill in self.fields:
+            array = np.full((capacity, columns) if columns > 1 else capacity, fill, dtype=dtype)
+            old = getattr(self, name, None)
+            if old is not None:
+                array[:len(old)] = old
+            setattr(self, name, array)
+        self.views.extend([None] * (capacity - len(self.views)))
+        self.capacity = capacity
+
+    def add(self, view, position, detection, radius, profession):
+        """Store a new agent and return its slot."""
+        if self.free_slots:
+            slot = self.free_slots.pop()
+        else:
+            if self.count == self.capacity:
+                self._allocate(self.capacity * 2)
+            slot = self.count
+            self.count += 1
+
+        tile = np.floor(np.asarray(position, dtype=np.float32) / self.tile_size) * self.tile_size
+        self.positions[slot] = position
+        self.targets[slot] = position
+        self.home_min[slot] = tile + self.margin
+        self.home_max[slot] = tile + np.asarray(self.tile_size, dtype=np.float32) - self.margin
+        self.detection[slot] = detection
+        self.radius[slot] = radius
+        self.profession[slot] = profession_id(profession)
+        self.state[slot] = STATE_WANDER
+        self.timers[slot] = self.rng.uniform(*self.wander_interval)
+        self.cells[slot] = np.floor(self.positions[slot] / self.cell_size)
+        self.views[slot] = view
+        return slot
+
+    def remove(self, slot):
+        self.state[slot] = STATE_FREE
+        self.views[slot] = None
+        self.free_slots.append(slot)
+
+    def __len__(self):
+        return self.count - len(self.free_slots)
+
+    def update(self, dt, player_pos=None):
+        """Advance every agent by dt; returns the slots that moved into another spatial-hash cell.
+
+        player_pos may also be a sequence of positions when several players share the world.
+        """
+        n = self.count
+        if n == 0:
+            return []
+        state = self.state[:n]
+        positions = self.positions[:n]
+
+        # Agents next to the player stop and wait, everyone else who isn't talking wanders
+        if player_pos is not None:
+            near = self.near_player(player_pos)
+            roaming = state != STATE_TALKING
+            state[roaming & near] = STATE_IDLE
+            state[roaming & ~near & (state != STATE_FREE)] = STATE_WANDER
+
+        wandering = state == STATE_WANDER
+
+        # Pick new targets inside the home tile for agents whose timer ran out
+        self.timers[:n] -= dt
+        retarget = wandering & (self.timers[:n] <= 0)
+        count = int(retarget.sum())
+        if count:
+            low, high = self.home_min[:n][retarget], self.home_max[:n][retarget]
+            self.targets[:n][retarget] = low + self.rng.random((count, 2), dtype=np.float32) * np.maximum(high - low, 0)
+            self.timers[:n][retarget] = self.rng.uniform(*self.wander_interval, count)
+
+        # Step towards the target without overshooting
+        delta = self.targets[:n] - positions
+        distance = np.sqrt((delta * delta).sum(axis=1))
+        step = np.minimum(distance, self.wander_speed * dt)
+        scale = np.divide(step, distance, out=np.zeros_like(distance), where=distance > 0)
+        scale[~wandering] = 0
+        positions += delta * scale[:, None]
+        np.clip(positions, self.home_min[:n], self.home_max[:n], out=positions, where=wandering[:, None])
+
+        # Report agents that changed spatial-hash cell so the index can re-bucket just those
+        cells = np.floor(positions / self.cell_size).astype(np.int32)
+        moved = np.nonzero(wandering & (cells != self.cells[:n]).any(axis=1))[0]
+        self.cells[:n] = cells
+        return moved.tolist()
+
+    def near_player(self, player_pos):
+        """Boolean mask of slots whose detection radius contains the player (or any of several players)."""
+        n = self.count
+        near = np.zeros(n, dtype=bool)
+        for position in np.asarray(player_pos, dtype=np.float32).reshape(-1, 2):
+            delta = self.positions[:n] - position
+            near |= (delta * delta).sum(axis=1) <= self.detection[:n] ** 2
+        return near & (self.state[:n] != STATE_FREE)
+
+    def visible_slots(self, view_rect):
+        """Slots of agents whose circle overlaps a world-space rect."""
+        n = self.count
+        x, y = self.positions[:n, 0], self.positions[:n, 1]
+        r = self.radius[:n]
+        inside = (
+            (x + r >= view_rect.left) & (x - r < view_rect.right)
+            & (y + r >= view_rect.top) & (y - r < view_rect.bottom)
+            & (self.state[:n] != STATE_FREE)
+        )
+        return np.nonzero(inside)[0]
+
+    def draw(self, screen, camera_offset, visibility=None):
+        """Draw every agent inside the screen (and the field of view, if given); returns how many were drawn."""
+        view_rect = screen.get_rect().move(int(camera_offset.x), int(camera_offset.y))
+        slots = self.visible_slots(view_rect)
+        if visibility is not None:
+            slots = slots[visibility.visible_points(self.positions[slots])]
+        if not len(slots):
+            return 0
+
+        # Top-left corners of the sprites, and which sprite each agent uses
+        radius = self.radius[slots].astype(np.int32)
+        centers = (self.positions[slots] - (camera_offset.x, camera_offset.y)).astype(np.int32)
+        corners = (centers - radius[:, None]).tolist()
+        keys = (radius << 16) | (self.profession[slots].astype(np.int32) << 8) | self.state[slots]
+        unique_keys, sprite_index = np.unique(keys, return_inverse=True)
+        sprites = np.empty(len(unique_keys), dtype=object)
+        sprites[:] = [sprite_atlas.agent_sprite(key) for key in unique_keys.tolist()]
+
+        screen.blits(zip(sprites[sprite_index].tolist(), corners), doreturn=False)
+        return len(corners)
+
+agent_system = AgentSystem()
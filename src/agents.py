@@ -1,177 +1,264 @@
-import pygame
-import json
-import os
-import math
-import time
-import random
-from ui import open_store_ui, handle_store_input
-
-root = os.path.dirname(os.path.realpath(__file__))
-with open(os.path.join(root, "data", "dialogue.json"), "r") as file:
-    dialogue_table = json.load(file)
-
-# Agent global
-size_human = 12
-
-class AGENT:
-    def __init__(self, position, detection, name: str, profession: str, dialogue: str, game_state):
-        self.position = pygame.Vector2(position)
-        self.detection = detection
-        self.name = name
-        self.profession = profession
-        self.dialogue = dialogue
-        self.text_visible = False
-        self.text_timer = 0
-        self.size = size_human
-        self.current_dialogue = ""
-        self.dialogue_options = []  # List of response options
-        self.selected_option = 0  # Index of the currently selected option
-
-    def draw(self, screen, camera_offset):
-        """Draw the NPC on the screen."""
-        screen_pos = self.position - camera_offset
-
-        color = "green"
-        if self.profession == "shopkeeper":
-            color = "blue"
-        if self.profession == "beggar":
-            color = pygame.Color(255, 255, 255, 255)
-
-        pygame.draw.circle(screen, color, (int(screen_pos.x), int(screen_pos.y)), self.size)
-        return screen_pos
-
-    def handle_interaction(self, player_pos, events, screen, font, camera_offset, game_state):
-        """Handle interaction with the player."""
-        player_screen_pos = player_pos - camera_offset
-        screen_pos = self.position - camera_offset
-
-        distance = math.hypot(player_screen_pos.x - screen_pos.x, player_screen_pos.y - screen_pos.y)
-
-        if distance <= self.detection:
-            for event in events:
-                if not game_state.dialogue_active:
-                    if event.type == pygame.MOUSEBUTTONDOWN:
-                        mouse_pos = pygame.mouse.get_pos()
-                        mouse_distance = math.hypot(mouse_pos[0] - screen_pos.x, mouse_pos[1] - screen_pos.y)
-                        if mouse_distance <= self.detection:
-                            self._trigger_dialogue(game_state)
-
-        if self.text_visible:
-            handle_dialogue_input(events, self, game_state, screen )
-                
-    def _trigger_dialogue(self, game_state):
-        """Trigger dialogue display."""
-        game_state.dialogue_active = True
-
-        print(dialogue_table, self.dialogue in dialogue_table)
-        if dialogue_table and self.dialogue in dialogue_table:
-            if game_state.debug_mode:
-                print(f"DEBUG: Triggering dialogue for {self.name} ({self.profession})")
-            dialogue_data = dialogue_table[self.dialogue]
-            self._load_dialogue(dialogue_data)
-        else:
-            if game_state.debug_mode:
-                print(f"DEBUG: No dialogue found for {self.name} ({self.profession})")
-            dialogue_data = dialogue_table["default"]
-            self._load_dialogue(dialogue_data)
-
-        self.text_visible = True
-        self.text_timer = time.time()
-
-    def _load_dialogue(self, dialogue_data):
-        """Load dialogue and options from the dialogue data."""
-        if isinstance(dialogue_data, dict):
-            # If dialogue_data is a dictionary, handle dialogue and options
-            dialogue = dialogue_data.get("dialogue", "...")
-            if isinstance(dialogue, list):
-                # If "dialogue" is a list, pick a random entry
-                self.current_dialogue = random.choice(dialogue)
-            else:
-                # Otherwise, use the string directly
-                self.current_dialogue = dialogue
-            self.dialogue_options = [
-                {
-                    "text": option["option"],
-                    "effect": option.get("effect", None),
-                    "response": option.get("response", None),
-                }
-                for option in dialogue_data.get("options", [])
-            ]
-        else:
-            self.current_dialogue = f"{self.name}: Invalid dialogue format."
-            self.dialogue_options = []
-
-
-# handle interaction and dialogues        
-def draw_dialogue_box(screen, font, dialogue_text, options, selected_option):
-    """Draw the dialogue box with text and selectable options."""
-
-    screen_width, screen_height = screen.get_size()
-
-    # Adjust the dialogue box position
-    dialogue_box_height = 160
-    dialogue_box_y = screen_height - dialogue_box_height - 150  # Move the box higher by 150 pixels
-
-    # Draw dialogue box background
-    pygame.draw.rect(screen, (50, 50, 50), (50, dialogue_box_y, screen_width - 100, dialogue_box_height))
-    pygame.draw.rect(screen, (255, 255, 255), (50, dialogue_box_y, screen_width - 100, dialogue_box_height), 2)
-
-    
-    # Render dialogue text    
-    text_surface = font.render(dialogue_text, True, (255, 255, 255))
-    screen.blit(text_surface, (70, dialogue_box_y + 10))
-
-    # Draw response options
-    option_y = dialogue_box_y + 50
-    for i, option in enumerate(options):
-        color = (255, 255, 0) if i == selected_option else (255, 255, 255)
-        optionText = f"{i+1}. {option['text']}"
-        option_surface = font.render(optionText, True, color)
-        screen.blit(option_surface, (70, option_y))
-        option_y += 30
-
-
-
-def handle_dialogue_input(events, agent, game_state, screen):
-    """Handle input for navigating and selecting dialogue options."""
-    for event in events:
-        if event.type == pygame.KEYDOWN:
-            if event.key == pygame.K_UP:
-                try:
-                    agent.selected_option = (agent.selected_option - 1) % len(agent.dialogue_options)
-                except:
-                    pass
-            elif event.key == pygame.K_DOWN:
-                try:
-                    agent.selected_option = (agent.selected_option + 1) % len(agent.dialogue_options)
-                except:
-                    pass
-            elif event.key == pygame.K_RETURN:
-                selected_option = agent.dialogue_options[agent.selected_option]
-                print(f"Selected option: '{selected_option['text']}', Effect: {selected_option['effect']}")
-
-                # Check if the selected option has an effect
-                if selected_option["effect"] == "open_shop":
-                    # Open the store UI
-                    items = ["itemA", "itemB", "itemB", "itemC"]
-                    selected_item_index = 0
-                    store_open = True
-                    while store_open:
-                        screen.fill((0, 0, 0))  # Clear the screen
-                        open_store_ui(screen, items, selected_item_index)
-                        pygame.display.flip()
-
-                        # Handle store input
-                        events = pygame.event.get()
-                        for event in events:
-                            if event.type == pygame.QUIT:
-                                pygame.quit()
-                                exit()
-                            elif event.type == pygame.KEYDOWN and event.key == pygame.K_ESCAPE:
-                                store_open = False  # Close the store
-                        selected_item_index = handle_store_input(events, items, selected_item_index, game_state.inventory )
-                elif "response" in selected_option and selected_option["response"]:
-                    agent._load_dialogue(selected_option["response"])
-                else:
-                    agent.text_visible = False
-                    game_state.dialogue_active = False
\ No newline at end of file
+import pygame
+import time
+import random
+from ui import StoreScene
+from scenes import Scene, scene_stack
+from fonts import get_font, render_text
+from agent_system import agent_system, sprite_atlas, STATE_TALKING, STATE_WANDER
+from dialogue import get_dialogue_library
+
+# Agent global
+size_human = 12
+dialogue_rng = random.Random()  # Picks between alternative lines; seeded for recordings and replays
+
+class AGENT:
+    """Dialogue-facing view of one NPC; position, detection and state live in agent_system."""
+    def __init__(self, position, detection, name: str, profession: str, dialogue: str, game_state):
+        self.slot = agent_system.add(self, position, detection, size_human, profession)
+        self.name = name
+        self.profession = profession
+        self.dialogue = dialogue
+        self.text_timer = 0
+        self.size = size_human
+        self.dialogue_tree = None  # DialogueTree of the current conversation
+        self.current_dialogue = ""
+        self.dialogue_options = ()  # DialogueOption tuple of the current node
+        self.selected_option = 0  # Index of the currently selected option
+
+    @property
+    def position(self):
+        return pygame.Vector2(agent_system.positions[self.slot].tolist())
+
+    @position.setter
+    def position(self, value):
+        agent_system.positions[self.slot] = (value[0], value[1])
+
+    @property
+    def detection(self):
+        return float(agent_system.detection[self.slot])
+
+    @property
+    def text_visible(self):
+        return agent_system.state[self.slot] == STATE_TALKING
+
+    @text_visible.setter
+    def text_visible(self, visible):
+        # Talking agents stop wandering until the conversation ends
+        agent_system.state[self.slot] = STATE_TALKING if visible else STATE_WANDER
+
+    def release(self):
+        """Free the agent's slot when its chunk is unloaded."""
+        agent_system.remove(self.slot)
+
+    def draw(self, screen, camera_offset):
+        """Draw the NPC on the screen (agent_system.draw does this for every NPC in one batch)."""
+        screen_pos = self.position - camera_offset
+        slot = self.slot
+        key = (self.size << 16) | (int(agent_system.profession[slot]) << 8) | int(agent_system.state[slot])
+        screen.blit(sprite_atlas.agent_sprite(key), (int(screen_pos.x) - self.size, int(screen_pos.y) - self.size))
+        return screen_pos
+
+    def _trigger_dialogue(self, game_state):
+        """Trigger dialogue display."""
+        game_state.dialogue_active = True
+
+        dialogue_library = get_dialogue_library()
+        tree = dialogue_library.tree(self.dialogue) if self.dialogue else None
+        if tree is not None:
+            if game_state.debug_mode:
+                print(f"DEBUG: Triggering dialogue for {self.name} ({self.profession})")
+        else:
+            if game_state.debug_mode:
+                print(f"DEBUG: No dialogue found for {self.name} ({self.profession})")
+            tree = dialogue_library.tree("default")
+
+        self.dialogue_tree = tree
+        self._load_dialogue(tree.root)
+        scene_stack.push(DialogueScene(self))
+
+        self.text_visible = True
+        self.text_timer = time.time()
+
+    def _load_dialogue(self, node):
+        """Show a dialogue node: pick one of its lines and offer its precompiled options."""
+        self.current_dialogue = dialogue_rng.choice(node.lines)
+        self.dialogue_options = node.options
+        self.selected_option = 0
+
+
+class AgentIndex:
+    """Spatial hash of agents in world space, so lookups only touch nearby cells."""
+    def __init__(self, cell_size=100):
+        self.cell_size = cell_size
+        self.cells = {}  # (cell_x, cell_y) -> list of agents
+        self.agent_cells = {}  # agent -> cell it is stored in
+        self.max_detection = 0  # Largest detection radius of any indexed agent
+
+    def __len__(self):
+        return len(self.agent_cells)
+
+    def _cell(self, position):
+        return (int(position[0] // self.cell_size), int(position[1] // self.cell_size))
+
+    def add(self, agent):
+        cell = self._cell(agent.position)
+        self.cells.setdefault(cell, []).append(agent)
+        self.agent_cells[agent] = cell
+        self.max_detection = max(self.max_detection, agent.detection)
+
+    def remove(self, agent):
+        cell = self.agent_cells.pop(agent, None)
+        if cell is None:
+            return
+        bucket = self.cells[cell]
+        bucket.remove(agent)
+        if not bucket:
+            del self.cells[cell]
+
+    def move(self, agent, position):
+        """Move an agent, re-bucketing it only when it crosses a cell boundary."""
+        agent.position = position
+        self.refresh(agent)
+
+    def refresh(self, agent):
+        """Re-bucket an agent whose position was changed elsewhere (e.g. by agent_system.update)."""
+        cell = self._cell(agent.position)
+        if self.agent_cells.get(agent) != cell:
+            self.remove(agent)
+            self.add(agent)
+
+    def query(self, point, radius):
+        """Return agents within radius of a world-space point."""
+        radius_sq = radius * radius
+        first_x, first_y = self._cell((point[0] - radius, point[1] - radius))
+        last_x, last_y = self._cell((point[0] + radius, point[1] + radius))
+
+        found = []
+        for cell_y in range(first_y, last_y + 1):
+            for cell_x in range(first_x, last_x + 1):
+                for agent in self.cells.get((cell_x, cell_y), ()):
+                    dx = agent.position.x - point[0]
+                    dy = agent.position.y - point[1]
+                    if dx * dx + dy * dy <= radius_sq:
+                        found.append(agent)
+        return found
+
+    def find_clicked(self, click_pos, player_pos, visibility=None):
+        """Return the agent closest to a click that is within detection of both the click and the player.
+
+        With a visibility mask (see fov.py) agents on tiles the player can't see are ignored.
+        """
+        best, best_distance_sq = None, None
+        for agent in self.query(click_pos, self.max_detection):
+            if visibility is not None and not visibility.point_visible(agent.position):
+                continue
+            detection_sq = agent.detection * agent.detection
+            click_distance_sq = agent.position.distance_squared_to(click_pos)
+            if click_distance_sq > detection_sq or agent.position.distance_squared_to(player_pos) > detection_sq:
+                continue
+            if best is None or click_distance_sq < best_distance_sq:
+                best, best_distance_sq = agent, click_distance_sq
+        return best
+
+def handle_agent_click(event, player_pos, camera_offset, agent_index, game_state, visibility=None):
+    """Start a dialogue with the agent under a mouse click, if the player is close enough (and can see it)."""
+    if game_state.dialogue_active:
+        return False
+    click_pos = pygame.Vector2(event.pos) + camera_offset
+    agent = agent_index.find_clicked(click_pos, player_pos, visibility)
+    if agent is None:
+        return False
+    agent._trigger_dialogue(game_state)
+    return True
+
+# handle interaction and dialogues        
+def dialogue_box_rect(screen):
+    """Screen area covered by the dialogue box."""
+    screen_width, screen_height = screen.get_size()
+
+    # Adjust the dialogue box position
+    dialogue_box_height = 160
+    dialogue_box_y = screen_height - dialogue_box_height - 150  # Move the box higher by 150 pixels
+    return pygame.Rect(50, dialogue_box_y, screen_width - 100, dialogue_box_height)
+
+def draw_dialogue_box(screen, font, dialogue_text, options, selected_option):
+    """Draw the dialogue box with text and selectable options."""
+
+    box_rect = dialogue_box_rect(screen)
+    dialogue_box_y = box_rect.y
+
+    # Draw dialogue box background
+    pygame.draw.rect(screen, (50, 50, 50), box_rect)
+    pygame.draw.rect(screen, (255, 255, 255), box_rect, 2)
+
+    
+    # Render dialogue text    
+    text_surface = render_text(font, dialogue_text, (255, 255, 255))
+    screen.blit(text_surface, (70, dialogue_box_y + 10))
+
+    # Draw response options
+    option_y = dialogue_box_y + 50
+    for i, option in enumerate(options):
+        color = (255, 255, 0) if i == selected_option else (255, 255, 255)
+        optionText = f"{i+1}. {option.text}"
+        option_surface = render_text(font, optionText, color)
+        screen.blit(option_surface, (70, option_y))
+        option_y += 30
+
+
+
+def handle_dialogue_event(event, agent, game_state):
+    """Navigate and select dialogue options; returns True for key presses, which the dialogue consumes."""
+    if event.type != pygame.KEYDOWN:
+        return False
+    if event.key == pygame.K_UP:
+        try:
+            agent.selected_option = (agent.selected_option - 1) % len(agent.dialogue_options)
+        except:
+            pass
+    elif event.key == pygame.K_DOWN:
+        try:
+            agent.selected_option = (agent.selected_option + 1) % len(agent.dialogue_options)
+        except:
+            pass
+    elif event.key == pygame.K_RETURN:
+        if not agent.dialogue_options:
+            # Nothing to choose, Enter just ends the conversation
+            agent.text_visible = False
+            game_state.dialogue_active = False
+            return True
+        selected_option = agent.dialogue_options[agent.selected_option]
+        if game_state.debug_mode:
+            print(f"Selected option: '{selected_option.text}', Effect: {selected_option.effect}")
+
+        # Check if the selected option has an effect
+        if selected_option.effect == "open_shop":
+            # Open the store on top of the dialogue; the main loop keeps running underneath
+            scene_stack.push(StoreScene(["itemA", "itemB", "itemB", "itemC"]))
+        elif selected_option.next is not None:
+            agent._load_dialogue(agent.dialogue_tree.node(selected_option.next))
+        else:
+            agent.text_visible = False
+            game_state.dialogue_active = False
+    return True
+
+class DialogueScene(Scene):
+    """Dialogue box for the agent we are talking to; closes itself when the conversation ends."""
+    def __init__(self, agent):
+        self.agent = agent
+
+    def handle_event(self, event, game_state):
+        consumed = handle_dialogue_event(event, self.agent, game_state)
+        self.update(0, game_state)
+        return consumed
+
+    def update(self, dt, game_state):
+        if not self.agent.text_visible:
+            scene_stack.remove(self)
+
+    def draw(self, screen):
+        draw_dialogue_box(screen, get_font(36), self.agent.current_dialogue, self.agent.dialogue_options, self.agent.selected_option)
+
+    def dirty_region(self, screen):
+        agent = self.agent
+        return dialogue_box_rect(screen), (agent.current_dialogue, agent.dialogue_options, agent.selected_option)
@@ -0,0 +1,7 @@
+"""Headless benchmarks for the frame pipeline.
+
+Run from the src directory:
+
+    python -m bench --scales 10,1000,100000 --output bench_results.json
+    python -m bench --compare bench_results.json
+"""
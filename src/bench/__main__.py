@@ -0,0 +1,166 @@
+import argparse
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+
+# Must be set before pygame creates a display
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+import pygame
+
+from bench.synthetic import write_synthetic_world, player_path
+
+phases = ["get_visible_chunks", "handle_collisions", "chunk_draw", "draw_ui", "frame"]
+
+def load_game():
+    """Import main (which opens the display and loads the world) without it parsing our arguments."""
+    saved_argv = sys.argv
+    # A fresh game that never touches the save slot, so local saves don't skew the numbers
+    sys.argv = [saved_argv[0], "--windowed", "--new-game", "--autosave", "0"]
+    try:
+        import main
+    finally:
+        sys.argv = saved_argv
+    return main
+
+def percentile(samples, fraction):
+    """Nearest-rank percentile of a list of samples."""
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, round(fraction * len(ordered)) - 1))
+    return ordered[index]
+
+def summarize(samples):
+    return {
+        "p50_ms": round(percentile(samples, 0.50), 4),
+        "p99_ms": round(percentile(samples, 0.99), 4),
+        "mean_ms": round(sum(samples) / len(samples), 4),
+        "max_ms": round(max(samples), 4),
+    }
+
+def run_scale(game, chunk_count, args):
+    """Benchmark world loading and every frame phase on one synthetic world size."""
+    import world as world_module
+    import world_store
+
+    result = {"chunks": chunk_count, "agents_per_chunk": args.agents_per_chunk, "frames": args.frames}
+    with tempfile.TemporaryDirectory() as directory:
+        world_path, agents_path, side = write_synthetic_world(directory, chunk_count, args.agents_per_chunk, args.seed)
+        compiled_path = os.path.join(directory, "world.bin")
+
+        start = time.perf_counter()
+        world_store.compile_world(world_path, agents_path, compiled_path)
+        result["compile_world_ms"] = round((time.perf_counter() - start) * 1000, 3)
+
+        # Point world_generation at the synthetic data for this run
+        saved_paths = (world_store.world_json_path, world_store.agents_json_path, world_store.compiled_world_path)
+        world_store.world_json_path, world_store.agents_json_path, world_store.compiled_world_path = world_path, agents_path, compiled_path
+        try:
+            start = time.perf_counter()
+            world = game.world_generation(game.game_state)
+            result["world_generation_ms"] = round((time.perf_counter() - start) * 1000, 3)
+        finally:
+            world_store.world_json_path, world_store.agents_json_path, world_store.compiled_world_path = saved_paths
+
+        world_module.surface_cache.clear()
+        saved_world = (game.world, game.collision_map)
+        game.world, game.collision_map = world, world.collision_map
+
+        screen = game.screen
+        half_screen = pygame.Vector2(screen.get_width() / 2, screen.get_height() / 2)
+        dt = game.SIM_DT
+        path = player_path(side, args.frames + 1)
+        samples = {phase: [] for phase in phases}
+        clock = time.perf_counter
+
+        try:
+            for frame in range(args.frames):
+                player_pos = pygame.Vector2(path[frame])
+                next_pos = pygame.Vector2(path[frame + 1])
+                camera_offset = player_pos - half_screen
+
+                t0 = clock()
+                visible_chunks = world_module.get_visible_chunks(player_pos, world)
+                t1 = clock()
+                game.handle_collisions(player_pos, next_pos, world.collision_map)
+                t2 = clock()
+                for chunk in visible_chunks:
+                    chunk.draw(screen, camera_offset)
+                t3 = clock()
+                game.draw_ui(screen)
+                t4 = clock()
+                game.handle_input([], player_pos, camera_offset, game.game_state)
+                game.update(player_pos, camera_offset, dt, game.game_state)
+                game.render(player_pos, camera_offset, game.game_state)
+                t5 = clock()
+
+                samples["get_visible_chunks"].append((t1 - t0) * 1000)
+                samples["handle_collisions"].append((t2 - t1) * 1000)
+                samples["chunk_draw"].append((t3 - t2) * 1000)
+                samples["draw_ui"].append((t4 - t3) * 1000)
+                samples["frame"].append((t5 - t4) * 1000)
+        finally:
+            game.world, game.collision_map = saved_world
+            world.close()
+
+    result["phases"] = {phase: summarize(phase_samples) for phase, phase_samples in samples.items()}
+    return result
+
+def compare(old, new):
+    """Print p50/p99 changes between two result files."""
+    for scale, new_result in new["scales"].items():
+        old_result = old["scales"].get(scale)
+        if old_result is None:
+            continue
+        print(f"== {scale} chunks ==")
+        for phase, stats in new_result["phases"].items():
+            old_stats = old_result["phases"].get(phase)
+            if old_stats is None:
+                continue
+            changes = []
+            for key in ("p50_ms", "p99_ms"):
+                before, after = old_stats[key], stats[key]
+                percent = (after - before) / before * 100 if before else 0.0
+                changes.append(f"{key} {before:.3f} -> {after:.3f} ({percent:+.1f}%)")
+            print(f"  {phase:<20} " + "  ".join(changes))
+
+def main():
+    parser = argparse.ArgumentParser(description="Headless frame pipeline benchmark")
+    parser.add_argument('--scales', default="10,1000,100000", help="comma separated chunk counts")
+    parser.add_argument('--frames', type=int, default=300)
+    parser.add_argument('--agents-per-chunk', type=int, default=8)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', default="bench_results.json")
+    parser.add_argument('--compare', metavar="BASELINE", help="previous results file to compare against")
+    args = parser.parse_args()
+
+    game = load_game()
+    results = {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "pygame": pygame.version.ver,
+            "platform": platform.platform(),
+        },
+        "scales": {},
+    }
+
+    for scale in [int(value) for value in args.scales.split(",")]:
+        print(f"Benchmarking {scale} chunks...")
+        results["scales"][str(scale)] = run_scale(game, scale, args)
+
+    with open(args.output, "w") as file:
+        json.dump(results, file, indent=2)
+    print(f"Results written to {args.output}")
+
+    if args.compare:
+        with open(args.compare, "r") as file:
+            compare(json.load(file), results)
+
+    pygame.quit()
+
+if __name__ == "__main__":
+    main()
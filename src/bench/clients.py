@@ -0,0 +1,102 @@
+import argparse
+import asyncio
+import json
+import time
+
+from bench.__main__ import summarize
+from bench.synthetic import player_path
+from protocol import MSG_HELLO, MSG_TICK, parse_address, read_frame, position_frame
+
+# Load test for server.py: many scripted clients on one machine, each walking its own part of
+# a lap and reporting its position every tick, the way the game does with --connect.
+#
+#     python server.py --seed 1 &
+#     python -m bench.clients --clients 100 --seconds 20
+
+class ClientStats:
+    def __init__(self):
+        self.bytes_received = 0
+        self.ticks = 0
+        self.tick_gaps = []  # Milliseconds between consecutive TICK messages
+
+async def run_client(address, path, seconds, stats):
+    address = parse_address(address)
+    if isinstance(address, tuple):
+        reader, writer = await asyncio.open_connection(*address)
+    else:
+        reader, writer = await asyncio.open_unix_connection(address)
+
+    kind, payload = await read_frame(reader)
+    if kind != MSG_HELLO:
+        raise ConnectionError("server didn't say hello")
+    tick_rate = json.loads(payload)["tick_rate"]
+
+    async def walk():
+        for position in path:
+            writer.write(position_frame(position))
+            await asyncio.sleep(1 / tick_rate)
+
+    async def receive():
+        last_tick = None
+        while True:
+            kind, payload = await read_frame(reader)
+            stats.bytes_received += len(payload) + 5
+            if kind == MSG_TICK:
+                now = time.perf_counter()
+                if last_tick is not None:
+                    stats.tick_gaps.append((now - last_tick) * 1000)
+                last_tick = now
+                stats.ticks += 1
+
+    receiving = asyncio.create_task(receive())
+    try:
+        await asyncio.wait_for(walk(), seconds)
+    except asyncio.TimeoutError:
+        pass
+    finally:
+        receiving.cancel()
+        writer.close()
+
+async def run(args):
+    # Every client starts at a different point of the same lap, so they spread over the world
+    steps = int(args.seconds * args.tick_rate)
+    lap = player_path(args.side, steps * 4, speed=args.speed, dt=1 / args.tick_rate)
+    stats = [ClientStats() for _ in range(args.clients)]
+    clients = []
+    for index in range(args.clients):
+        offset = index * len(lap) // args.clients
+        path = (lap[offset:] + lap[:offset])[:steps]
+        clients.append(run_client(args.address, path, args.seconds, stats[index]))
+
+    start = time.perf_counter()
+    await asyncio.gather(*clients)
+    elapsed = time.perf_counter() - start
+
+    gaps = [gap for client in stats for gap in client.tick_gaps]
+    return {
+        "clients": args.clients,
+        "seconds": round(elapsed, 3),
+        "ticks_per_client": round(sum(client.ticks for client in stats) / args.clients, 1),
+        "kib_per_client_per_second": round(sum(client.bytes_received for client in stats) / args.clients / elapsed / 1024, 3),
+        "tick_gap": summarize(gaps) if gaps else None,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Scripted clients for load testing server.py")
+    parser.add_argument('--address', default="127.0.0.1:7777", help="host:port of the server, or a Unix socket path")
+    parser.add_argument('--clients', type=int, default=50)
+    parser.add_argument('--seconds', type=float, default=10)
+    parser.add_argument('--tick-rate', type=int, default=30, help="position reports per second per client")
+    parser.add_argument('--side', type=int, default=16, help="world side in chunks the lap is laid out on")
+    parser.add_argument('--speed', type=float, default=200, help="walking speed in pixels per second")
+    parser.add_argument('--output', help="write the results as JSON")
+    args = parser.parse_args()
+
+    results = asyncio.run(run(args))
+    print(json.dumps(results, indent=2))
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(results, file, indent=2)
+
+if __name__ == "__main__":
+    main()
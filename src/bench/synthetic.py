@@ -0,0 +1,70 @@
+import json
+import math
+import os
+import random
+
+professions = ["shopkeeper", "beggar", "none"]
+
+def synthetic_world_data(chunk_count, agents_per_chunk, seed=0, chunk_size=(10, 10)):
+    """Generate world.json / agents.json style data for a roughly square grid of chunks."""
+    rng = random.Random(seed)
+    side = max(1, math.ceil(math.sqrt(chunk_count)))
+    width, height = chunk_size
+
+    world_data = []
+    agents_data = []
+    for i in range(chunk_count):
+        chunk_x, chunk_y = i % side, i // side
+
+        # Open floor with a few furniture blocks and doorways in the walls, so paths cross chunks
+        tile_map = [[0] * width for _ in range(height)]
+        for col in range(width):
+            if col not in (4, 5):
+                tile_map[0][col] = 1
+        for _ in range(6):
+            tile_map[rng.randrange(2, height - 1)][rng.randrange(1, width - 1)] = 2
+
+        world_data.append({
+            "roomIdentifier": f"room_{chunk_x}_{chunk_y}",
+            "position": [chunk_x, chunk_y],
+            "tile": tile_map,
+        })
+
+        for _ in range(agents_per_chunk):
+            agents_data.append({
+                "name": "Synthetic",
+                "type": "human",
+                "profession": rng.choice(professions),
+                "chunk_position": [chunk_x, chunk_y],
+                "tile": [rng.randrange(width), rng.randrange(1, height)],
+                "tile_offset": [rng.randrange(50), rng.randrange(50)],
+                "dialogue": "default",
+                "detection": 60,
+            })
+
+    return world_data, agents_data, side
+
+def write_synthetic_world(directory, chunk_count, agents_per_chunk, seed=0):
+    """Write a synthetic world.json / agents.json pair and return their paths and the grid side."""
+    world_data, agents_data, side = synthetic_world_data(chunk_count, agents_per_chunk, seed)
+    world_path = os.path.join(directory, f"world_{chunk_count}.json")
+    agents_path = os.path.join(directory, f"agents_{chunk_count}.json")
+
+    with open(world_path, "w") as file:
+        json.dump(world_data, file, separators=(",", ":"))
+    with open(agents_path, "w") as file:
+        json.dump(agents_data, file, separators=(",", ":"))
+
+    return world_path, agents_path, side
+
+def player_path(side, frames, chunk_pixels=500, speed=400, dt=1 / 60):
+    """Scripted player path: a lap around the middle of the world, crossing chunk borders on each side."""
+    center = side * chunk_pixels / 2
+    radius = max(chunk_pixels * 0.75, min(side * chunk_pixels / 3, 4 * chunk_pixels))
+    circumference = 2 * math.pi * radius
+
+    path = []
+    for frame in range(frames):
+        angle = 2 * math.pi * ((frame * speed * dt) % circumference) / circumference
+        path.append((center + radius * math.cos(angle), center + radius * math.sin(angle)))
+    return path
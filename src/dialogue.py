@@ -0,0 +1,227 @@
+import os
+import re
+import sys
+import json
+import mmap
+import struct
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+# Compiled dialogue file layout (little endian):
+#   header: magic, version, index offset, index length
+#   trees:  one compact JSON blob per dialogue key (string table + nodes)
+#   index:  JSON object mapping dialogue key -> [offset, length]
+MAGIC = b"DLG1"
+HEADER = struct.Struct("<4sQI")
+
+root = os.path.dirname(os.path.realpath(__file__))
+dialogue_json_path = os.path.join(root, "data", "dialogue.json")
+compiled_dialogue_path = os.path.join(root, "data", "dialogue.bin")
+
+simple_effects = {"open_shop"}
+give_effect = re.compile(r"^give_([a-z]+)_(\d+)$")  # e.g. give_bullet_1
+
+def parse_effect(effect):
+    """Validate an effect name and return (name, args); raises ValueError for unknown effects."""
+    if effect in simple_effects:
+        return effect, ()
+    match = give_effect.match(effect)
+    if match:
+        return "give", (match.group(1), int(match.group(2)))
+    raise ValueError(f"unknown dialogue effect '{effect}'")
+
+class DialogueOption:
+    __slots__ = ("text", "effect", "effect_args", "next")
+
+    def __init__(self, text, effect, effect_args, next_node):
+        self.text = text
+        self.effect = effect  # Effect name as written in the data, or None
+        self.effect_args = effect_args
+        self.next = next_node  # Index of the response node, or None to end the dialogue
+
+class DialogueNode:
+    __slots__ = ("lines", "options")
+
+    def __init__(self, lines, options):
+        self.lines = lines  # Tuple of alternative lines, one is picked at random
+        self.options = options  # Tuple of DialogueOption
+
+class DialogueTree:
+    """All nodes reachable from one dialogue key; node 0 is the entry point."""
+    def __init__(self, key, nodes):
+        self.key = key
+        self.nodes = nodes
+
+    @property
+    def root(self):
+        return self.nodes[0]
+
+    def node(self, index):
+        return self.nodes[index]
+
+def compile_tree(key, data):
+    """Flatten one dialogue entry into a string table and a list of nodes."""
+    strings = []
+    string_ids = {}
+
+    def intern_string(text):
+        if text not in string_ids:
+            string_ids[text] = len(strings)
+            strings.append(text)
+        return string_ids[text]
+
+    nodes = []
+
+    def add_node(node_data, path):
+        if not isinstance(node_data, dict):
+            raise ValueError(f"{path}: expected an object, got {type(node_data).__name__}")
+        lines = node_data.get("dialogue", "...")
+        if isinstance(lines, str):
+            lines = [lines]
+        if not lines:
+            raise ValueError(f"{path}: empty dialogue")
+
+        index = len(nodes)
+        node = [[intern_string(line) for line in lines], []]
+        nodes.append(node)
+
+        options = node_data.get("options", [])
+        if "option" in node_data:  # Shorthand for a single option that ends the dialogue
+            options = [{"option": node_data["option"]}]
+
+        for i, option in enumerate(options):
+            option_path = f"{path}.options[{i}]"
+            if "option" not in option:
+                raise ValueError(f"{option_path}: missing 'option' text")
+            effect = option.get("effect")
+            if effect is not None:
+                try:
+                    parse_effect(effect)
+                except ValueError as error:
+                    raise ValueError(f"{option_path}: {error}") from None
+
+            # A response can be nested under "response" or given inline as the option's own "dialogue"
+            response = option.get("response")
+            if response is None and "dialogue" in option:
+                response = {"dialogue": option["dialogue"]}
+            next_node = add_node(response, f"{option_path}.response") if response else None
+
+            node[1].append([intern_string(option["option"]), effect, next_node])
+        return index
+
+    add_node(data, key)
+    return {"strings": strings, "nodes": nodes}
+
+def compile_dialogue(json_path, out_path):
+    """Compile dialogue.json into an indexed file of pre-flattened trees."""
+    with open(json_path, "r", encoding="utf-8") as file:
+        dialogue_table = json.load(file)
+
+    index = {}
+    tmp_path = out_path + ".tmp"
+    with open(tmp_path, "wb") as file:
+        file.write(bytes(HEADER.size))
+        for key in sorted(dialogue_table):
+            blob = json.dumps(compile_tree(key, dialogue_table[key]), separators=(",", ":")).encode("utf-8")
+            index[key] = [file.tell(), len(blob)]
+            file.write(blob)
+
+        index_blob = json.dumps(index, separators=(",", ":")).encode("utf-8")
+        index_offset = file.tell()
+        file.write(index_blob)
+
+        file.seek(0)
+        file.write(HEADER.pack(MAGIC, index_offset, len(index_blob)))
+
+    os.replace(tmp_path, out_path)
+    return len(index)
+
+class DialogueLibrary:
+    """Memory-mapped compiled dialogue; trees are decoded the first time their key is used."""
+    def __init__(self, path, cache_size=256):
+        self.path = path
+        self.cache_size = cache_size
+        self._file = open(path, "rb")
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, self._index_offset, self._index_length = HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a compiled dialogue file")
+        self._index = None
+        self._trees = OrderedDict()  # key -> DialogueTree, LRU
+
+    def close(self):
+        self._map.close()
+        self._file.close()
+
+    @property
+    def index(self):
+        if self._index is None:
+            self._index = json.loads(self._map[self._index_offset:self._index_offset + self._index_length])
+        return self._index
+
+    def __contains__(self, key):
+        return key in self.index
+
+    def tree(self, key):
+        """Return the DialogueTree for a key, or None if there is no such dialogue."""
+        tree = self._trees.get(key)
+        if tree is not None:
+            self._trees.move_to_end(key)
+            return tree
+
+        entry = self.index.get(key)
+        if entry is None:
+            return None
+        offset, length = entry
+        data = json.loads(self._map[offset:offset + length])
+
+        strings = [sys.intern(text) for text in data["strings"]]
+        nodes = []
+        for line_ids, options in data["nodes"]:
+            nodes.append(DialogueNode(
+                tuple(strings[i] for i in line_ids),
+                tuple(
+                    DialogueOption(strings[text_id], effect, parse_effect(effect)[1] if effect else (), next_node)
+                    for text_id, effect, next_node in options
+                ),
+            ))
+        tree = DialogueTree(key, nodes)
+
+        self._trees[key] = tree
+        if len(self._trees) > self.cache_size:
+            self._trees.popitem(last=False)
+        return tree
+
+def needs_compile(out_path, source):
+    return not os.path.exists(out_path) or os.path.getmtime(source) > os.path.getmtime(out_path)
+
+dialogue_library = None
+compiling = None  # Future of the background compile started by prepare_dialogue_library
+
+def prepare_dialogue_library():
+    """Recompile dialogue.json on a background thread if dialogue.bin is missing or stale.
+
+    Called at startup, so talking to the first NPC only has to open the compiled file.
+    """
+    global compiling
+    if compiling is None and needs_compile(compiled_dialogue_path, dialogue_json_path):
+        executor = ThreadPoolExecutor(max_workers=1)
+        compiling = executor.submit(compile_dialogue, dialogue_json_path, compiled_dialogue_path)
+        executor.shutdown(wait=False)
+
+def get_dialogue_library():
+    """Open the compiled dialogue on first use, recompiling it if dialogue.json changed."""
+    global dialogue_library, compiling
+    if dialogue_library is None:
+        if compiling is not None:
+            compiling.result()  # Normally long finished by the time anyone talks
+            compiling = None
+        if needs_compile(compiled_dialogue_path, dialogue_json_path):
+            compile_dialogue(dialogue_json_path, compiled_dialogue_path)
+        dialogue_library = DialogueLibrary(compiled_dialogue_path)
+    return dialogue_library
+
+if __name__ == "__main__":
+    count = compile_dialogue(dialogue_json_path, compiled_dialogue_path)
+    print(f"Compiled {count} dialogue trees to {compiled_dialogue_path}")
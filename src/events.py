@@ -0,0 +1,55 @@
+# Central event routing. Each pygame event is looked at once per frame: focus handlers (open
+# overlays) see it first, then only the handlers subscribed to its event type. A handler returns
+# True to consume the event so nothing after it sees it.
+
+class EventRouter:
+    def __init__(self):
+        self._handlers = {}  # event type -> [(priority, handler)], highest priority first
+        self._early_handlers = {}  # Same, for handlers that run ahead of the focus stack
+        self._focus = []  # Focus stack; the top handler sees every event before the type handlers
+
+    def subscribe(self, event_type, handler, priority=0, before_focus=False):
+        """Call handler(event, *context) for events of this type; higher priorities run first.
+
+        before_focus handlers (window events, debug keys) run even while an overlay has focus.
+        """
+        table = self._early_handlers if before_focus else self._handlers
+        handlers = table.setdefault(event_type, [])
+        handlers.append((priority, handler))
+        handlers.sort(key=lambda entry: -entry[0])  # Stable, so equal priorities keep subscription order
+        return handler
+
+    def unsubscribe(self, event_type, handler):
+        for table in (self._early_handlers, self._handlers):
+            handlers = table.get(event_type, [])
+            handlers[:] = [entry for entry in handlers if entry[1] != handler]
+
+    def push_focus(self, handler):
+        """Give a handler first look at every event (e.g. an open dialogue) until it is removed."""
+        self._focus.append(handler)
+        return handler
+
+    def remove_focus(self, handler):
+        if handler in self._focus:
+            self._focus.remove(handler)
+
+    def dispatch(self, events, *context):
+        """Route each event once; context is passed on to every handler."""
+        for event in events:
+            self.dispatch_event(event, *context)
+
+    def dispatch_event(self, event, *context):
+        """Route one event; returns True if a handler consumed it."""
+        # Copies, since handlers may open or close overlays (and so change focus) while running
+        for _, handler in tuple(self._early_handlers.get(event.type, ())):
+            if handler(event, *context):
+                return True
+        for handler in self._focus[::-1]:
+            if handler(event, *context):
+                return True
+        for _, handler in tuple(self._handlers.get(event.type, ())):
+            if handler(event, *context):
+                return True
+        return False
+
+router = EventRouter()
@@ -0,0 +1,54 @@
+import pygame
+from collections import OrderedDict
+
+# Shared fonts and rendered text, so nothing is loaded or rasterized twice
+
+fonts = {}  # (name, size) -> Font
+
+def get_font(size, name=None):
+    """Return the font for a face and size, loading it on first use."""
+    key = (name, size)
+    font = fonts.get(key)
+    if font is None:
+        font = pygame.font.Font(name, size)
+        fonts[key] = font
+    return font
+
+class TextCache:
+    """LRU cache of rendered text surfaces keyed by (text, font, colour, antialias)."""
+    def __init__(self, max_entries):
+        self.max_entries = max_entries
+        self.surfaces = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def render(self, font, text, color, antialias=True):
+        """Return the rendered surface for text, rasterizing it only on a miss."""
+        if not isinstance(color, tuple):
+            color = tuple(pygame.Color(color))
+        key = (text, font, color, antialias)
+
+        surface = self.surfaces.get(key)
+        if surface is not None:
+            self.hits += 1
+            self.surfaces.move_to_end(key)
+            return surface
+
+        self.misses += 1
+        surface = font.render(text, antialias, color)
+        self.surfaces[key] = surface
+        if len(self.surfaces) > self.max_entries:
+            self.surfaces.popitem(last=False)
+        return surface
+
+    def clear(self):
+        self.surfaces.clear()
+
+    def stats(self):
+        return {"entries": len(self.surfaces), "hits": self.hits, "misses": self.misses}
+
+text_cache = TextCache(512)
+
+def render_text(font, text, color, antialias=True):
+    """Render text through the shared cache."""
+    return text_cache.render(font, text, color, antialias)
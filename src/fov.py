@@ -0,0 +1,206 @@
+from collections import OrderedDict
+import numpy as np
+import pygame
+
+# Field of view by recursive shadowcasting (one pass per octant) over the tiles' opacity.
+# Results are square boolean masks centred on the origin tile, cached per origin tile.
+
+# (xx, xy, yx, yy) transforms mapping the first octant onto each of the eight
+octants = [
+    (1, 0, 0, 1), (0, 1, 1, 0), (0, -1, 1, 0), (-1, 0, 0, 1),
+    (-1, 0, 0, -1), (0, -1, -1, 0), (0, 1, -1, 0), (1, 0, 0, -1),
+]
+
+class VisibilityMask:
+    """Tiles visible from an origin tile, as a (2r+1) x (2r+1) grid indexed [row, col]."""
+    __slots__ = ("origin", "radius", "tile_size", "cells")
+
+    def __init__(self, origin, radius, tile_size):
+        self.origin = origin
+        self.radius = radius
+        self.tile_size = tile_size
+        self.cells = np.zeros((2 * radius + 1, 2 * radius + 1), dtype=bool)
+
+    def tile_visible(self, tile):
+        col, row = tile[0] - self.origin[0] + self.radius, tile[1] - self.origin[1] + self.radius
+        size = 2 * self.radius + 1
+        return 0 <= col < size and 0 <= row < size and bool(self.cells[row, col])
+
+    def point_visible(self, point):
+        """Whether the tile under a world-space point is visible."""
+        return self.tile_visible((int(point[0] // self.tile_size[0]), int(point[1] // self.tile_size[1])))
+
+    def visible_points(self, points):
+        """Boolean array: which world-space points (N x 2) lie on a visible tile."""
+        tiles = np.floor(np.asarray(points, dtype=np.float32) / self.tile_size).astype(np.int64)
+        cols = tiles[:, 0] - self.origin[0] + self.radius
+        rows = tiles[:, 1] - self.origin[1] + self.radius
+        size = 2 * self.radius + 1
+        inside = (cols >= 0) & (cols < size) & (rows >= 0) & (rows < size)
+        result = np.zeros(len(tiles), dtype=bool)
+        result[inside] = self.cells[rows[inside], cols[inside]]
+        return result
+
+class FieldOfView:
+    """The player's field of view, recomputed only when they step onto another tile."""
+    def __init__(self, world, chunk_size, tile_size, radius=20, cache_size=64):
+        self.world = world
+        self.chunk_size = chunk_size
+        self.tile_size = tile_size
+        self.radius = radius  # In tiles
+        self.cache_size = cache_size
+        self.current = None  # VisibilityMask of the last update
+        self._cache = OrderedDict()  # origin tile -> VisibilityMask, LRU
+        self._fog = None  # (mask, rects of the tiles hidden from that mask), see draw_fog
+        self.computed = 0  # Masks computed (cache misses), for profiling
+
+    def update(self, player_pos):
+        """Return the mask for the player's tile, from the cache when possible."""
+        origin = (int(player_pos[0] // self.tile_size[0]), int(player_pos[1] // self.tile_size[1]))
+        if self.current is not None and self.current.origin == origin:
+            return self.current
+
+        mask = self._cache.get(origin)
+        if mask is None:
+            mask = self.compute(origin)
+            self._cache[origin] = mask
+            if len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        else:
+            self._cache.move_to_end(origin)
+        self.current = mask
+        return mask
+
+    def invalidate_chunk(self, chunk_x, chunk_y):
+        """Forget every cached mask that could see into a chunk whose tiles changed."""
+        left, top = chunk_x * self.chunk_size[0] - self.radius, chunk_y * self.chunk_size[1] - self.radius
+        right, bottom = left + self.chunk_size[0] + 2 * self.radius, top + self.chunk_size[1] + 2 * self.radius
+        for origin in [origin for origin in self._cache if left <= origin[0] < right and top <= origin[1] < bottom]:
+            del self._cache[origin]
+        if self.current is not None and left <= self.current.origin[0] < right and top <= self.current.origin[1] < bottom:
+            self.current = None
+            self._fog = None
+
+    def _opacity(self, origin):
+        """Opacity of the tiles around origin as a grid of rows (lists) indexed [row][col]."""
+        radius = self.radius
+        size = 2 * radius + 1
+        opaque = np.zeros((size, size), dtype=np.uint8)  # Unloaded chunks don't block sight
+        width, height = self.chunk_size
+        left, top = origin[0] - radius, origin[1] - radius
+
+        for chunk_y in range(top // height, (top + size - 1) // height + 1):
+            for chunk_x in range(left // width, (left + size - 1) // width + 1):
+                chunk = self.world.chunks.get((chunk_x, chunk_y))
+                if chunk is None:
+                    continue
+                tiles = np.frombuffer(chunk.opaque_mask(), dtype=np.uint8).reshape(height, width)
+                # Overlap of this chunk with the window, in window coordinates
+                x0, y0 = chunk_x * width - left, chunk_y * height - top
+                col0, row0 = max(x0, 0), max(y0, 0)
+                col1, row1 = min(x0 + width, size), min(y0 + height, size)
+                opaque[row0:row1, col0:col1] = tiles[row0 - y0:row1 - y0, col0 - x0:col1 - x0]
+        return opaque.tolist()
+
+    def compute(self, origin):
+        mask = VisibilityMask(origin, self.radius, self.tile_size)
+        opaque = self._opacity(origin)
+        lit = mask.cells
+        lit[self.radius, self.radius] = True
+        for transform in octants:
+            self._cast_light(opaque, lit, 1, 1.0, 0.0, transform)
+        self.computed += 1
+        return mask
+
+    def _cast_light(self, opaque, lit, row, start, end, transform):
+        """Scan one octant row by row, recursing around every wall that splits the light."""
+        if start < end:
+            return
+        radius = self.radius
+        radius_sq = radius * radius
+        xx, xy, yx, yy = transform
+        new_start = start
+        for distance in range(row, radius + 1):
+            dx, dy = -distance - 1, -distance
+            blocked = False
+            while dx <= 0:
+                dx += 1
+                col = radius + dx * xx + dy * xy
+                row_index = radius + dx * yx + dy * yy
+                left_slope, right_slope = (dx - 0.5) / (dy + 0.5), (dx + 0.5) / (dy - 0.5)
+                if start < right_slope:
+                    continue
+                if end > left_slope:
+                    break
+                if dx * dx + dy * dy <= radius_sq:
+                    lit[row_index, col] = True
+                wall = opaque[row_index][col]
+                if blocked:
+                    if wall:
+                        new_start = right_slope
+                    else:
+                        blocked = False
+                        start = new_start
+                elif wall and distance < radius:
+                    blocked = True
+                    self._cast_light(opaque, lit, distance + 1, start, left_slope, transform)
+                    new_start = right_slope
+            if blocked:
+                break
+
+    def _hidden_rects(self, mask):
+        """Rects covering the hidden cells of a mask, relative to its top-left corner: runs of a
+        row, merged with the same run on the rows below."""
+        tile_width, tile_height = self.tile_size
+        size = 2 * mask.radius + 1
+        rects = []
+        open_runs = {}  # (start col, end col) -> first row of the rect still growing downwards
+        for row, cells in enumerate(mask.cells.tolist() + [[True] * size]):  # A visible row closes every rect
+            runs = {}
+            col = 0
+            while col < size:
+                if cells[col]:
+                    col += 1
+                    continue
+                start = col
+                while col < size and not cells[col]:
+                    col += 1
+                runs[(start, col)] = open_runs.pop((start, col), row)
+            for (start, end), first_row in open_runs.items():
+                rects.append(pygame.Rect(start * tile_width, first_row * tile_height, (end - start) * tile_width, (row - first_row) * tile_height))
+            open_runs = runs
+        return rects
+
+    def draw_fog(self, screen, camera_offset):
+        """Cover every tile outside the current field of view."""
+        mask = self.current
+        if mask is None:
+            return
+        # The hidden area only changes with the origin; each frame just fills the part on screen
+        if self._fog is None or self._fog[0] is not mask:
+            self._fog = (mask, self._hidden_rects(mask))
+
+        tile_width, tile_height = self.tile_size
+        size = 2 * mask.radius + 1
+        position = (
+            int((mask.origin[0] - mask.radius) * tile_width - camera_offset.x),
+            int((mask.origin[1] - mask.radius) * tile_height - camera_offset.y),
+        )
+        # Rects are clipped first: fill() with a rect starting off screen overshoots its far edges
+        screen_rect = screen.get_rect()
+        for rect in self._fog[1]:
+            rect = rect.move(position).clip(screen_rect)
+            if rect.width > 0 and rect.height > 0:
+                screen.fill("black", rect)
+
+        # Beyond the radius nothing is visible either
+        covered = pygame.Rect(position, (size * tile_width, size * tile_height))
+        for rect in (
+            pygame.Rect(0, 0, screen_rect.width, covered.top),
+            pygame.Rect(0, covered.bottom, screen_rect.width, screen_rect.height - covered.bottom),
+            pygame.Rect(0, covered.top, covered.left, covered.height),
+            pygame.Rect(covered.right, covered.top, screen_rect.width - covered.right, covered.height),
+        ):
+            rect = rect.clip(screen_rect)
+            if rect.width > 0 and rect.height > 0:
+                screen.fill("black", rect)
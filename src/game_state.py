@@ -1,5 +1,19 @@
-class GameState:
-    def __init__(self):
-        self.dialogue_active = False
-        self.debug_mode = False
-        self.inventory = []
\ No newline at end of file
+import copy
+
+class GameState:
+    def __init__(self):
+        self.dialogue_active = False
+        self.debug_mode = False
+        self.inventory = []
+
+    # Fields written to save files; dialogue_active and debug_mode only matter for the running session
+    saved_fields = ("inventory",)
+
+    def snapshot(self):
+        """Copy of the saved fields, safe to hand to the autosave thread."""
+        return {name: copy.deepcopy(getattr(self, name)) for name in self.saved_fields}
+
+    def restore(self, data):
+        for name in self.saved_fields:
+            if name in data:
+                setattr(self, name, data[name])
\ No newline at end of file
@@ -1,179 +1,468 @@
-import pygame
-import os
-import argparse
-from world import world_generation, get_visible_chunks
-from agents import size_human, draw_dialogue_box, handle_dialogue_input
-from ui import draw_ui
-from ui import handle_ui_events
-from game_state import GameState
-
-root = os.path.dirname(os.path.realpath(__file__))
-
-parser = argparse.ArgumentParser(description="Adventure Game")
-parser.add_argument('--debug', action='store_true')
-parser.add_argument('--windowed', action='store_true')
-args = parser.parse_args()
-
-# pygame setup
-pygame.init()
-pygame.display.set_caption("Adventure Game")
-
-flags = pygame.RESIZABLE if args.windowed else pygame.FULLSCREEN
-screen = pygame.display.set_mode((1920, 1080), flags)
-
-clock = pygame.time.Clock()
-
-# Global
-game_state = GameState()  # Initialize shared game state
-game_state.debug_mode = args.debug
-game_state.inventory = []
-
-dialogue_active = False
-
-sprint_timer = 0
-sprint_cooldown = 0
-
-font = pygame.font.Font(None, 36)
-
-# Load world
-chunks = world_generation(game_state)
-def handle_controls(player_pos, dt, chunks, game_state):
-    """Handles player movement, sprinting, and collision detection."""
-    global sprint_timer, sprint_cooldown
-
-    # Prevent movement if a dialogue is active
-    if game_state.dialogue_active:
-        return player_pos
-
-    keys = pygame.key.get_pressed()
-    new_pos = player_pos.copy()
-
-    # Sprint logic
-    current_time = pygame.time.get_ticks() / 1000  # Get current time in seconds
-    sprint_speed = 200  # Default movement speed
-    if keys[pygame.K_LSHIFT] and current_time - sprint_cooldown >= 3:  # Sprint cooldown is 3 seconds
-        if sprint_timer < 3:  # Sprint duration is 3 seconds
-            sprint_speed = 400  # Increased speed during sprint
-            sprint_timer += dt
-        else:
-            sprint_cooldown = current_time  # Start cooldown after sprint ends
-            sprint_timer = 0  # Reset sprint timer
-
-    # Movement logic
-    if keys[pygame.K_w] or keys[pygame.K_UP]:
-        new_pos.y -= sprint_speed * dt
-    if keys[pygame.K_s] or keys[pygame.K_DOWN]:
-        new_pos.y += sprint_speed * dt
-    if keys[pygame.K_a] or keys[pygame.K_LEFT]:
-        new_pos.x -= sprint_speed * dt
-    if keys[pygame.K_d] or keys[pygame.K_RIGHT]:
-        new_pos.x += sprint_speed * dt
-
-    # Handle collisions
-    new_pos = handle_collisions(player_pos, new_pos, chunks)
-
-    return new_pos
-
-def handle_collisions(player_pos, new_pos, chunks):
-    """Handle collisions with NPCs and tiles in chunks."""
-
-    for chunk in chunks:
-        for tile in chunk.tiles:
-            if not tile.walkable:
-                tile_rect = pygame.Rect(tile.position[0], tile.position[1], tile.size[0], tile.size[1])
-                player_rect = pygame.Rect(new_pos.x - 6, new_pos.y - 6, size_human, size_human)
-                if player_rect.colliderect(tile_rect):
-                    return player_pos  # Block movement by returning the original position
-
-    return new_pos  # No collision, allow movement
-
-def render(player_pos, events, dt, camera_offset, game_state):
-    """Handles the logic for level 1 with a static level and camera movement."""
-
-    # Fill the screen with the level background
-    screen.fill("black")
-
-    # Render only the visible chunks and their contents
-    visible_chunks = get_visible_chunks(player_pos, chunks)
-
-    for chunk in visible_chunks:
-        chunk.draw(screen, camera_offset)
-        if game_state.debug_mode:
-            chunk.draw_debug_info(screen, camera_offset, font)
-
-        # Handle interactions with NPCs in the chunk
-        for agent in chunk.agents:
-            agent.handle_interaction(player_pos, events, screen, font, camera_offset, game_state)
-            if agent.text_visible:
-                handle_dialogue_input(events, agent, game_state, screen)
-
-    # Adjust player position based on the camera offset
-    player_screen_pos = player_pos - camera_offset
-
-    # Draw the player
-    pygame.draw.circle(screen, "red", (int(player_screen_pos.x), int(player_screen_pos.y)), 12)
-
-    # Handle player movement and collision detection
-    new_pos = handle_controls(player_pos, dt, chunks, game_state)
-    player_pos = new_pos  # Update position
-
-    # Camera movement logic
-    center_x, center_y = screen.get_width() // 2, screen.get_height() // 2
-    free_zone = 150
-
-    if player_screen_pos.x < center_x - free_zone // 2:
-        camera_offset.x -= center_x - free_zone // 2 - player_screen_pos.x
-    elif player_screen_pos.x > center_x + free_zone // 2:
-        camera_offset.x += player_screen_pos.x - (center_x + free_zone // 2)
-
-    if player_screen_pos.y < center_y - free_zone // 2:
-        camera_offset.y -= center_y - free_zone // 2 - player_screen_pos.y
-    elif player_screen_pos.y > center_y + free_zone // 2:
-        camera_offset.y += player_screen_pos.y - (center_y + free_zone // 2)
-
-    # Draw the UI
-    buttons = draw_ui(screen)
-    handle_ui_events(events, buttons)
-
-    # Draw the dialogue box last to ensure it is on top
-    for chunk in visible_chunks:
-        for agent in chunk.agents:
-            if agent.text_visible:
-                draw_dialogue_box(screen, font, agent.current_dialogue, agent.dialogue_options, agent.selected_option)
-
-    return player_pos, camera_offset
-
-def main():
-    running = True
-    dt = 0
-    #player_pos = pygame.Vector2(screen.get_width() / 2, screen.get_height() / 2)
-    player_pos = pygame.Vector2(445, 325)
-
-    # Main game loop
-    camera_offset = pygame.Vector2(0, 0)  # Initial camera offset
-    while running:
-        # Poll for events
-        events = pygame.event.get()
-        for event in events:
-            if event.type == pygame.QUIT:
-                running = False
-
-        # Call render and update the player position and camera offset
-        player_pos, camera_offset = render(player_pos, events, dt, camera_offset, game_state)
-
-
-        # Flip the display to put your work on screen
-        pygame.display.flip()
-
-        # Limit FPS to 60
-        dt = clock.tick(60) / 1000
-
-        # Quit the game if Q is pressed
-        keys = pygame.key.get_pressed()
-        if keys[pygame.K_q]:
-            running = False
-
-    pygame.quit()
-
-if __name__ == "__main__":
-    main()
\ No newline at end of file
+import time
+startup_begin = time.perf_counter()  # Taken before any other import for --startup-report
+
+import pygame
+import os
+import argparse
+from world import World, world_generation, get_visible_chunks, chunk_size, tile_size
+from agents import size_human, handle_agent_click, dialogue_rng
+from ui import draw_ui, build_buttons
+from ui import handle_ui_click
+from game_state import GameState
+from fonts import get_font
+from present import DirtyRectPresenter, circle_rect
+from agent_system import agent_system, sprite_atlas
+from scenes import scene_stack
+from events import router
+from profiler import profiler, StartupTimer
+from viewport import Viewport
+from fov import FieldOfView
+from savegame import SaveSlot, default_save_path
+from recording import LiveInput, InputRecorder, ReplayInput, state_hash
+from remote import ServerConnection
+from dialogue import prepare_dialogue_library
+
+startup = StartupTimer(startup_begin)
+startup.mark("import")
+
+root = os.path.dirname(os.path.realpath(__file__))
+
+parser = argparse.ArgumentParser(description="Adventure Game")
+parser.add_argument('--debug', action='store_true')
+parser.add_argument('--windowed', action='store_true')
+parser.add_argument('--dirty-rects', action='store_true', help="only present the screen regions that changed")
+parser.add_argument('--fps', type=int, default=60, help="render frame rate cap, 0 for uncapped")
+parser.add_argument('--vsync', action='store_true', help="sync presentation to the display refresh rate")
+parser.add_argument('--profile', type=int, metavar="FRAMES", help="capture per-phase timings for this many frames")
+parser.add_argument('--profile-format', choices=["csv", "cprofile"], default="csv")
+parser.add_argument('--profile-output', help="capture file (default profile.csv / profile.prof)")
+parser.add_argument('--seed', type=int, help="generate chunks beyond the hand-authored world from this seed")
+parser.add_argument('--fog', action='store_true', help="hide the tiles and NPCs the player has no line of sight to")
+parser.add_argument('--startup-report', action='store_true', help="print a time-to-first-frame breakdown")
+save_mode = parser.add_mutually_exclusive_group()
+save_mode.add_argument('--continue', dest='resume', action='store_true', help="resume from the save slot (the default when it holds a save)")
+save_mode.add_argument('--new-game', action='store_true', help="start over, replacing the save in the slot")
+parser.add_argument('--save-slot', default=default_save_path, help="directory the game is saved to")
+parser.add_argument('--autosave', type=float, default=30, metavar="SECONDS", help="autosave interval, 0 to disable saving")
+parser.add_argument('--record', metavar="FILE", help="record the input of this session for --replay")
+parser.add_argument('--replay', metavar="FILE", help="play a recording back headless, as fast as possible")
+parser.add_argument('--connect', metavar="ADDRESS", help="play in the world of a server.py (host:port or Unix socket path)")
+parser.add_argument('--replay-trace', default="replay_trace.csv", help="per-frame timings written during --replay")
+args = parser.parse_args()
+
+replay = None
+if args.replay:
+    replay = ReplayInput(args.replay)
+    # Same world as the recording, a fresh game, no save writes and no frame cap
+    args.seed, args.resume, args.autosave, args.fps = replay.world_seed, False, 0, 0
+    args.windowed = True
+    os.environ["SDL_VIDEODRIVER"] = "dummy"
+elif args.record:
+    # A recording has to start from a fresh game, and only replaces the save when asked to
+    if args.resume:
+        parser.error("--record starts a new game and can't be combined with --continue")
+    if not args.new_game:
+        args.autosave = 0
+else:
+    args.resume = not args.new_game  # Never overwrite a save without --new-game
+if args.connect:
+    if args.record or args.replay:
+        parser.error("sessions on a server can't be recorded or replayed")
+    args.resume, args.autosave = False, 0  # The server owns the world, nothing is saved locally
+
+# pygame setup, only the subsystems the game uses (audio and joystick init can be slow)
+pygame.display.init()
+pygame.font.init()
+pygame.display.set_caption("Adventure Game")
+
+flags = pygame.RESIZABLE if args.windowed else pygame.FULLSCREEN
+if args.vsync:
+    flags |= pygame.SCALED  # pygame only honours vsync for scaled or OpenGL displays
+screen_size = tuple(replay.screen_size) if replay is not None else (1920, 1080)  # The camera depends on it
+screen = pygame.display.set_mode(screen_size, flags, vsync=1 if args.vsync else 0)
+
+# Where events and key states come from: pygame, pygame plus a recording, or a recording
+if replay is not None:
+    input_source = replay
+elif args.record:
+    input_source = InputRecorder(args.record, screen.get_size(), args.seed)
+else:
+    input_source = LiveInput()
+if input_source.dialogue_seed is not None:
+    dialogue_rng.seed(input_source.dialogue_seed)
+
+clock = pygame.time.Clock()
+presenter = DirtyRectPresenter() if args.dirty_rects else None
+viewport = Viewport()  # Scrolling back-buffer for the level background
+
+# Global
+game_state = GameState()  # Initialize shared game state
+game_state.debug_mode = args.debug
+game_state.inventory = []
+
+dialogue_active = False
+running = True
+
+# Simulation runs at a fixed rate, independent of how fast we render
+SIM_DT = 1 / 60
+MAX_FRAME_TIME = 0.25  # Drop simulation time after long hitches instead of spiralling
+sim_time = 0  # Seconds of simulated time, drives the sprint timers
+
+sprint_timer = 0
+sprint_cooldown = 0
+
+font = get_font(36)
+prepare_dialogue_library()  # dialogue.bin is a build artifact, compile it before the first NPC is clicked
+startup.mark("init")
+
+# --new-game starts an empty save in the slot, the old one is only replaced once it is written
+save_slot = SaveSlot(args.save_slot, new_game=args.new_game) if args.autosave > 0 or args.resume else None
+if save_slot is not None and save_slot.state is not None:
+    game_state.restore(save_slot.state["game_state"])
+
+# Load world, this only opens the chunk stores; chunks are built as they come into view
+remote = None
+if args.connect:
+    # Chunks come from the server as the player approaches them, NPCs are moved by its ticks
+    remote = ServerConnection(args.connect)
+    world = World(source=remote.source, game_state=game_state)
+    remote.attach(world)
+else:
+    world = world_generation(game_state, args.seed, save_slot.chunk_source() if save_slot is not None else None)
+startup.mark("data")
+collision_map = world.collision_map  # Walkability index used by handle_collisions
+if args.fog:
+    world.fov = FieldOfView(world, chunk_size, tile_size)
+def handle_controls(player_pos, dt, collision_map, game_state):
+    """Handles player movement, sprinting, and collision detection."""
+    global sprint_timer, sprint_cooldown
+
+    # Prevent movement if a dialogue is active
+    if game_state.dialogue_active:
+        return player_pos
+
+    keys = input_source.key_state()
+    new_pos = player_pos.copy()
+
+    # Sprint logic
+    current_time = sim_time  # Simulated time in seconds
+    sprint_speed = 200  # Default movement speed
+    if keys[pygame.K_LSHIFT] and current_time - sprint_cooldown >= 3:  # Sprint cooldown is 3 seconds
+        if sprint_timer < 3:  # Sprint duration is 3 seconds
+            sprint_speed = 400  # Increased speed during sprint
+            sprint_timer += dt
+        else:
+            sprint_cooldown = current_time  # Start cooldown after sprint ends
+            sprint_timer = 0  # Reset sprint timer
+
+    # Movement logic
+    if keys[pygame.K_w] or keys[pygame.K_UP]:
+        new_pos.y -= sprint_speed * dt
+    if keys[pygame.K_s] or keys[pygame.K_DOWN]:
+        new_pos.y += sprint_speed * dt
+    if keys[pygame.K_a] or keys[pygame.K_LEFT]:
+        new_pos.x -= sprint_speed * dt
+    if keys[pygame.K_d] or keys[pygame.K_RIGHT]:
+        new_pos.x += sprint_speed * dt
+
+    # Handle collisions
+    new_pos = handle_collisions(player_pos, new_pos, collision_map)
+
+    return new_pos
+
+def handle_collisions(player_pos, new_pos, collision_map):
+    """Handle collisions with tiles, resolving each axis separately so the player slides along walls."""
+    resolved = player_pos.copy()
+
+    # Horizontal axis first, then vertical from wherever we ended up
+    player_rect = pygame.Rect(new_pos.x - 6, resolved.y - 6, size_human, size_human)
+    if not collision_map.rect_blocked(player_rect):
+        resolved.x = new_pos.x
+
+    player_rect = pygame.Rect(resolved.x - 6, new_pos.y - 6, size_human, size_human)
+    if not collision_map.rect_blocked(player_rect):
+        resolved.y = new_pos.y
+
+    return resolved
+
+# Event handlers; the router only calls each one for the event types it is subscribed to
+def on_quit(event, player_pos, camera_offset, game_state):
+    global running
+    running = False
+    return True
+
+def on_resize(event, player_pos, camera_offset, game_state):
+    if presenter is not None:
+        presenter.force_full()
+    return False
+
+def on_debug_key(event, player_pos, camera_offset, game_state):
+    if event.key == pygame.K_F3:
+        profiler.toggle_overlay()
+        return True
+    return False
+
+def on_overlay_event(event, player_pos, camera_offset, game_state):
+    """Open overlays (dialogue, store...) see input first; a capturing one hides it from the world."""
+    return scene_stack.handle_event(event, game_state)
+
+def on_ui_click(event, player_pos, camera_offset, game_state):
+    return handle_ui_click(event, build_buttons(screen))
+
+def on_agent_click(event, player_pos, camera_offset, game_state):
+    """Clicking an NPC starts a dialogue."""
+    visibility = world.fov.current if world.fov is not None else None  # NPCs in the fog can't be clicked
+    return handle_agent_click(event, player_pos, camera_offset, world.agent_index, game_state, visibility)
+
+router.subscribe(pygame.QUIT, on_quit, before_focus=True)
+router.subscribe(pygame.VIDEORESIZE, on_resize, before_focus=True)
+router.subscribe(pygame.KEYDOWN, on_debug_key, before_focus=True)
+router.push_focus(on_overlay_event)
+router.subscribe(pygame.MOUSEBUTTONDOWN, on_ui_click, priority=1)  # The UI bar is drawn over the world
+router.subscribe(pygame.MOUSEBUTTONDOWN, on_agent_click)
+
+def handle_input(events, player_pos, camera_offset, game_state):
+    """Route this frame's events, each one once: overlays first, then UI buttons, then NPC clicks."""
+    get_visible_chunks(player_pos, world)  # Agents are indexed once their chunk is loaded
+    router.dispatch(events, player_pos, camera_offset, game_state)
+
+def update(player_pos, camera_offset, dt, game_state):
+    """Advance the simulation by one fixed tick: player movement, collisions and the camera."""
+    global sim_time
+    sim_time += dt
+
+    # Make sure the chunks around the player are loaded before colliding against them
+    with profiler.phase("visible_chunks"):
+        get_visible_chunks(player_pos, world)
+
+    # Handle player movement and collision detection
+    with profiler.phase("controls"):
+        player_pos = handle_controls(player_pos, dt, collision_map, game_state)
+
+    # Move every loaded NPC in one batch, or take their positions from the server
+    with profiler.phase("agents_update"):
+        if remote is not None:
+            remote.poll(player_pos)
+        else:
+            world.update_agents(dt, player_pos)
+
+    # Route requests queued by NPCs are answered within a fixed time slice per tick
+    with profiler.phase("pathfinding"):
+        profiler.count("paths_planned", world.pathfinder.process(budget_ms=1.0))
+
+    scene_stack.update(dt, game_state)
+
+    # Camera movement logic
+    camera_offset = camera_offset.copy()
+    player_screen_pos = player_pos - camera_offset
+    center_x, center_y = screen.get_width() // 2, screen.get_height() // 2
+    free_zone = 150
+
+    if player_screen_pos.x < center_x - free_zone // 2:
+        camera_offset.x -= center_x - free_zone // 2 - player_screen_pos.x
+    elif player_screen_pos.x > center_x + free_zone // 2:
+        camera_offset.x += player_screen_pos.x - (center_x + free_zone // 2)
+
+    if player_screen_pos.y < center_y - free_zone // 2:
+        camera_offset.y -= center_y - free_zone // 2 - player_screen_pos.y
+    elif player_screen_pos.y > center_y + free_zone // 2:
+        camera_offset.y += player_screen_pos.y - (center_y + free_zone // 2)
+
+    return player_pos, camera_offset
+
+def render(player_pos, camera_offset, game_state):
+    """Draw the level, NPCs, player, UI and dialogue for the given (interpolated) positions."""
+
+    # Render only the visible chunks and their contents
+    with profiler.phase("visible_chunks"):
+        visible_chunks = get_visible_chunks(player_pos, world)
+    profiler.count("chunks_visible", len(visible_chunks))
+
+    # Adjust player position based on the camera offset
+    player_screen_pos = player_pos - camera_offset
+
+    # In dirty-rect mode skip drawing entirely when nothing on screen changed
+    if presenter is not None and not track_dirty_regions(player_screen_pos, visible_chunks, camera_offset):
+        return
+
+    with profiler.phase("chunk_draw"):
+        # The level background scrolls in a back-buffer, only newly exposed strips are redrawn
+        strips_before = viewport.strips_drawn
+        viewport.draw(screen, camera_offset, visible_chunks)
+
+        if game_state.debug_mode:
+            for chunk in visible_chunks:
+                chunk.draw_debug_info(screen, camera_offset, font)
+    profiler.count("draw_calls", 2)  # Back-buffer blit and the player
+    profiler.count("strips_drawn", viewport.strips_drawn - strips_before)
+
+    # Fog of war: line of sight is only recomputed when the player enters another tile
+    visibility = None
+    if world.fov is not None:
+        with profiler.phase("fov"):
+            visibility = world.fov.update(player_pos)
+            world.fov.draw_fog(screen, camera_offset)
+        profiler.count("draw_calls", 1)
+
+    # Draw the NPCs on screen, culled against the camera (and the field of view) in one batch
+    with profiler.phase("agents_draw"):
+        agents_drawn = agent_system.draw(screen, camera_offset, visibility)
+    profiler.count("draw_calls", 1 if agents_drawn else 0)  # All of them go out in one blits call
+    profiler.count("agents_drawn", agents_drawn)
+
+    # Other players on the same server
+    if remote is not None:
+        for position in remote.players.values():
+            screen.blit(sprite_atlas.circle("orange", 12), (int(position[0] - camera_offset.x) - 12, int(position[1] - camera_offset.y) - 12))
+
+    # Draw the player
+    screen.blit(sprite_atlas.circle("red", 12), (int(player_screen_pos.x) - 12, int(player_screen_pos.y) - 12))
+
+    # Draw the UI
+    with profiler.phase("draw_ui"):
+        draw_ui(screen)
+
+    # Draw overlays (dialogue box, store...) last to ensure they are on top
+    with profiler.phase("dialogue"):
+        scene_stack.draw(screen)
+
+    profiler.draw_overlay(screen)
+
+def track_dirty_regions(player_screen_pos, visible_chunks, camera_offset):
+    """Register this frame's dynamic elements with the presenter; returns False if nothing changed."""
+    presenter.begin(camera_offset)
+    presenter.track("player", circle_rect(player_screen_pos, 12))
+    if remote is not None:
+        for client_id, position in remote.players.items():
+            presenter.track(("player", client_id), circle_rect(pygame.Vector2(position) - camera_offset, 12))
+
+    # Chunks that stream in (or out) or get a tile edited change the level under a still camera
+    chunk_width, chunk_height = world.chunk_pixel_size
+    for chunk in visible_chunks:
+        chunk_rect = (int(chunk.chunk_position[0] - camera_offset.x), int(chunk.chunk_position[1] - camera_offset.y), chunk_width, chunk_height)
+        presenter.track(("chunk", chunk.chunk_coords), chunk_rect, chunk.version)
+
+    # The state picks the sprite (the talking outline), so a change has to be redrawn too
+    for chunk in visible_chunks:
+        for agent in chunk.agents:
+            presenter.track(agent, circle_rect(agent.position - camera_offset, agent.size), int(agent_system.state[agent.slot]))
+
+    for scene in scene_stack:
+        rect, state = scene.dirty_region(screen)
+        presenter.track(scene, rect, state)
+
+    if world.fov is not None:
+        # The fog covers the whole screen and changes whenever the player enters another tile
+        presenter.track("fog", screen.get_rect(), world.fov.update(player_screen_pos + camera_offset).origin)
+
+    if profiler.overlay_visible:
+        presenter.track("profiler", profiler.overlay_rect(), profiler.frame_index)
+
+    mouse_pos = pygame.mouse.get_pos()
+    for button in build_buttons(screen):
+        presenter.track(("button", button["label"]), button["rect"], button["rect"].collidepoint(mouse_pos))
+
+    return presenter.prepare(screen)
+
+def main():
+    global running
+    running = True
+    #player_pos = pygame.Vector2(screen.get_width() / 2, screen.get_height() / 2)
+    player_pos = pygame.Vector2(445, 325)
+    camera_offset = pygame.Vector2(0, 0)  # Initial camera offset
+    if save_slot is not None and save_slot.state is not None:
+        player_pos = pygame.Vector2(save_slot.state["player"])
+        camera_offset = player_pos - pygame.Vector2(screen.get_width() // 2, screen.get_height() // 2)
+    last_save = time.perf_counter()
+
+    # Main game loop
+    previous_pos, previous_camera = player_pos.copy(), camera_offset.copy()
+    accumulator = 0
+    frame_time = 0
+
+    # F3 toggles the profiler overlay; --debug starts with it open
+    if game_state.debug_mode:
+        profiler.toggle_overlay()
+    if args.profile:
+        default_output = "profile.prof" if args.profile_format == "cprofile" else "profile.csv"
+        profiler.start_capture(args.profile, args.profile_output or default_output, args.profile_format)
+    elif replay is not None:
+        profiler.start_capture(len(replay) + 1, args.replay_trace)  # +1 for the closing QUIT frame
+
+    # Build the chunks around the player before the first frame
+    if remote is not None:
+        remote.wait_for_world(player_pos)
+    get_visible_chunks(player_pos, world)
+    startup.mark("world build")
+    first_frame = True
+
+    clock.tick()
+    replay_start = time.perf_counter()
+    while running:
+        profiler.begin_frame()
+
+        # Poll for events
+        with profiler.phase("events"):
+            events, frame_time = input_source.next_frame(frame_time)
+
+        # Every event goes through the router once (quit, resize and F3 included)
+        with profiler.phase("interaction"):
+            handle_input(events, player_pos, camera_offset, game_state)
+
+        # Run as many fixed simulation ticks as the elapsed time covers
+        accumulator += min(frame_time, MAX_FRAME_TIME)
+        while accumulator >= SIM_DT:
+            previous_pos, previous_camera = player_pos, camera_offset
+            player_pos, camera_offset = update(player_pos, camera_offset, SIM_DT, game_state)
+            accumulator -= SIM_DT
+
+        # Draw between the last two simulation states so motion stays smooth at any frame rate
+        alpha = accumulator / SIM_DT
+        render(previous_pos.lerp(player_pos, alpha), previous_camera.lerp(camera_offset, alpha), game_state)
+
+        # Flip the display to put your work on screen
+        with profiler.phase("flip"):
+            if presenter is not None:
+                presenter.present(screen)
+            else:
+                pygame.display.flip()
+        profiler.end_frame()
+
+        if first_frame:
+            first_frame = False
+            startup.mark("first frame")
+            if args.startup_report:
+                print(startup.report())
+
+        # Limit FPS (0 = uncapped); the time it took feeds the next frame's simulation ticks
+        frame_time = clock.tick(args.fps) / 1000
+
+        # Snapshot the changes on this thread, the files are written in the background
+        if save_slot is not None and args.autosave > 0 and time.perf_counter() - last_save >= args.autosave:
+            with profiler.phase("autosave"):
+                if save_slot.save_async(world, game_state, player_pos):
+                    last_save = time.perf_counter()
+
+        # Quit the game if Q is pressed
+        keys = input_source.key_state()
+        if keys[pygame.K_q]:
+            running = False
+
+    profiler.stop_capture()
+    input_source.close()
+    if replay is not None:
+        elapsed = time.perf_counter() - replay_start
+        print(f"Replayed {replay.frame_index} frames in {elapsed:.2f} s ({replay.frame_index / elapsed:.0f} frames/s)")
+    if replay is not None or args.record:
+        # A replay of the recording must end with the same hash
+        print(f"Final state hash: {state_hash(player_pos, sim_time, game_state, world)}")
+    if save_slot is not None and args.autosave > 0:
+        save_slot.wait()  # A save still in flight must finish before the final one snapshots
+        save_slot.save_async(world, game_state, player_pos)
+        save_slot.close()
+    if remote is not None:
+        remote.close()
+    pygame.quit()
+
+if __name__ == "__main__":
+    main()
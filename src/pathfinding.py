@@ -0,0 +1,410 @@
+import heapq
+import time
+from collections import OrderedDict, deque
+
+# Hierarchical pathfinding over the chunk grid (HPA*):
+#   portals: one tile pair in the middle of every walkable stretch of a chunk border
+#   chunk graph: per chunk, the walking distance between its portals plus the links across borders
+# Long routes are searched on the portal graph and only turned into tile steps one chunk at a
+# time while they are being followed (see Path).
+
+class ChunkGraph:
+    """Portals of one chunk and the abstract edges leaving them."""
+    __slots__ = ("portals", "links")
+
+    def __init__(self):
+        self.portals = []  # Global tile coords of this chunk's portal tiles
+        self.links = {}  # portal tile -> [(tile, cost)], portals in this chunk or across a border
+
+class Path:
+    """Route from a start to a goal tile, refined to tile steps one waypoint at a time."""
+    def __init__(self, service, waypoints):
+        self.service = service
+        self.waypoints = deque(waypoints)  # Abstract route: start, portals..., goal
+        self.steps = deque()  # Tile steps of the segment being followed
+        self.current = self.waypoints.popleft()
+
+    def next_tile(self):
+        """Return the next tile to step onto, or None once the goal has been reached."""
+        while not self.steps:
+            if not self.waypoints:
+                return None
+            target = self.waypoints.popleft()
+            segment = self.service.refine(self.current, target)
+            if segment is None:
+                # The chunk changed since the route was planned, the caller should ask again
+                self.waypoints.clear()
+                return None
+            self.steps.extend(segment)
+            self.current = target
+        return self.steps.popleft()
+
+    def next_position(self):
+        """World-space centre of the next tile, or None at the goal."""
+        tile = self.next_tile()
+        if tile is None:
+            return None
+        tile_size = self.service.tile_size
+        return ((tile[0] + 0.5) * tile_size[0], (tile[1] + 0.5) * tile_size[1])
+
+class PathRequest:
+    __slots__ = ("start", "goal", "path", "done", "search")
+
+    def __init__(self, start, goal):
+        self.start = start
+        self.goal = goal
+        self.path = None  # Path, or None if the goal is unreachable
+        self.done = False
+        self.search = None  # RouteSearch in progress, carried over between process() calls
+
+class RouteSearch:
+    """A* over the portal graph that can stop at a deadline and pick up where it left off."""
+    def __init__(self, service, start, goal):
+        self.service = service
+        self.start = start
+        self.goal = goal
+        self.done = False
+        self.waypoints = None  # Result once done: start, portals..., goal, or None if unreachable
+        self.expansions = 0
+        self.open_heap = []  # (estimate, cost, node) heap of the A* frontier
+        self.best = {start: 0}  # node -> cheapest cost found so far
+        self.came_from = {}
+        self.bounds = None  # (min_x, max_x, min_y, max_y) chunks the route may pass through
+
+        if not service.walkable(start) or not service.walkable(goal):
+            self._finish(None)
+            return
+        if start == goal:
+            self._finish((start, goal))
+            return
+
+        self.start_costs, start_distance = service._portal_costs(start)
+        start_chunk, goal_chunk = service.chunk_of(start), service.chunk_of(goal)
+        if start_chunk == goal_chunk:
+            width = service.chunk_size[0]
+            index = (goal[1] - goal_chunk[1] * service.chunk_size[1]) * width + goal[0] - goal_chunk[0] * width
+            if start_distance[index] >= 0:
+                self._finish((start, goal))  # Reachable without leaving the chunk
+                return
+        self.goal_costs, _ = service._portal_costs(goal)  # Grid moves are symmetric, so portal -> goal == goal -> portal
+        if not self.goal_costs:
+            self._finish(None)
+            return
+
+        # Without a bound an unreachable goal in an endless generated world would search forever
+        margin = service.search_margin
+        self.bounds = (
+            min(start_chunk[0], goal_chunk[0]) - margin, max(start_chunk[0], goal_chunk[0]) + margin,
+            min(start_chunk[1], goal_chunk[1]) - margin, max(start_chunk[1], goal_chunk[1]) + margin,
+        )
+        self.open_heap = [(self._heuristic(start), 0, start)]
+
+    def _finish(self, waypoints):
+        self.waypoints = waypoints
+        self.done = True
+        self.open_heap = []
+
+    def _heuristic(self, tile):
+        return abs(tile[0] - self.goal[0]) + abs(tile[1] - self.goal[1])
+
+    def run(self, deadline=None):
+        """Expand nodes until the search is done or the perf_counter deadline passes; returns done."""
+        if self.done:
+            return True
+        service = self.service
+        goal = self.goal
+        min_x, max_x, min_y, max_y = self.bounds
+        open_heap, best, came_from = self.open_heap, self.best, self.came_from
+        since_check = 0
+        while open_heap:
+            # The clock is read every few expansions, and after any that had to build a chunk graph
+            if deadline is not None and since_check >= service.expansions_per_check:
+                if time.perf_counter() >= deadline:
+                    return False
+                since_check = 0
+
+            _, cost, node = heapq.heappop(open_heap)
+            if node == goal:
+                waypoints = [goal]
+                while node in came_from:
+                    node = came_from[node]
+                    waypoints.append(node)
+                waypoints.reverse()
+                self._finish(tuple(waypoints))
+                return True
+            if cost > best.get(node, cost):
+                continue
+            self.expansions += 1
+            since_check += 1
+            if self.expansions > service.max_expansions:
+                break
+
+            chunk_key = service.chunk_of(node)
+            if chunk_key not in service._graphs:
+                since_check = service.expansions_per_check
+            edges = list(service._graph(chunk_key).links.get(node, ()))
+            if node == self.start:
+                edges.extend(self.start_costs.items())
+            if node in self.goal_costs:
+                edges.append((goal, self.goal_costs[node]))
+            for neighbour, step_cost in edges:
+                chunk_x, chunk_y = service.chunk_of(neighbour)
+                if not (min_x <= chunk_x <= max_x and min_y <= chunk_y <= max_y):
+                    continue
+                new_cost = cost + step_cost
+                if new_cost < best.get(neighbour, new_cost + 1):
+                    best[neighbour] = new_cost
+                    came_from[neighbour] = node
+                    heapq.heappush(open_heap, (new_cost + self._heuristic(neighbour), new_cost, neighbour))
+        self._finish(None)
+        return True
+
+class PathfindingService:
+    """Batched route queries over a World's tile walkability."""
+    def __init__(self, world, chunk_size, tile_size, search_margin=4, max_expansions=20000, expansions_per_check=16, cache_size=1024, chunk_cache_size=4096):
+        self.world = world
+        self.chunk_size = chunk_size
+        self.tile_size = tile_size
+        self.search_margin = search_margin  # Chunks a route may stray outside the start/goal bounding box
+        self.max_expansions = max_expansions  # Abstract nodes searched before a goal counts as unreachable
+        self.expansions_per_check = expansions_per_check  # Abstract nodes searched between looks at the time budget
+        self.cache_size = cache_size  # Planned routes kept
+        self.chunk_cache_size = chunk_cache_size  # Walkability masks and chunk graphs kept
+
+        self._masks = OrderedDict()  # (chunk_x, chunk_y) -> walkable bytes, or None for chunks that don't exist; LRU
+        self._graphs = {}  # (chunk_x, chunk_y) -> ChunkGraph
+        self._paths = OrderedDict()  # (start, goal) -> waypoints, LRU
+        self._paths_by_chunk = {}  # (chunk_x, chunk_y) -> cache keys of routes through it
+        self._queue = deque()
+
+    # Queries
+
+    def request(self, start, goal):
+        """Queue a route between two world-space points; the result arrives during process()."""
+        request = PathRequest(self.tile_of(start), self.tile_of(goal))
+        self._queue.append(request)
+        return request
+
+    def process(self, budget_ms=1.0):
+        """Work on queued requests until the time budget is spent; returns how many were answered.
+
+        A long search stops at the deadline and carries on in the next call, so one route can
+        take several ticks instead of stalling one.
+        """
+        deadline = time.perf_counter() + budget_ms / 1000
+        answered = 0
+        while self._queue:
+            request = self._queue[0]
+            key = (request.start, request.goal)
+            waypoints = self._cached(key) if request.search is None else None
+            if waypoints is None:
+                if request.search is None:
+                    request.search = RouteSearch(self, request.start, request.goal)
+                if not request.search.run(deadline):
+                    break
+                waypoints = request.search.waypoints
+                request.search = None
+                if waypoints is not None:
+                    self._remember(key, waypoints)
+
+            self._queue.popleft()
+            request.path = Path(self, waypoints) if waypoints is not None else None
+            request.done = True
+            answered += 1
+            if time.perf_counter() >= deadline:
+                break
+        return answered
+
+    def find_path(self, start, goal):
+        """Plan a route between two tiles right away; returns a Path or None."""
+        key = (start, goal)
+        waypoints = self._cached(key)
+        if waypoints is None:
+            search = RouteSearch(self, start, goal)
+            search.run()
+            waypoints = search.waypoints
+            if waypoints is None:
+                return None
+            self._remember(key, waypoints)
+        return Path(self, waypoints)
+
+    def _cached(self, key):
+        waypoints = self._paths.get(key)
+        if waypoints is not None:
+            self._paths.move_to_end(key)
+        return waypoints
+
+    def _remember(self, key, waypoints):
+        self._paths[key] = waypoints
+        for chunk_key in {self.chunk_of(tile) for tile in waypoints}:
+            self._paths_by_chunk.setdefault(chunk_key, set()).add(key)
+        if len(self._paths) > self.cache_size:
+            self._forget_path(next(iter(self._paths)))
+
+    def invalidate_chunk(self, chunk_x, chunk_y):
+        """Drop everything derived from a chunk's tiles; call after editing them."""
+        self._masks.pop((chunk_x, chunk_y), None)
+        # Border portals are shared, so the neighbours' graphs are stale too
+        for key in ((chunk_x, chunk_y), (chunk_x - 1, chunk_y), (chunk_x + 1, chunk_y), (chunk_x, chunk_y - 1), (chunk_x, chunk_y + 1)):
+            self._graphs.pop(key, None)
+        for path_key in list(self._paths_by_chunk.get((chunk_x, chunk_y), ())):
+            self._forget_path(path_key)
+        # Searches still in progress may have walked through the old tiles, so they start over
+        for request in self._queue:
+            request.search = None
+
+    def _forget_path(self, key):
+        waypoints = self._paths.pop(key)
+        for chunk_key in {self.chunk_of(tile) for tile in waypoints}:
+            keys = self._paths_by_chunk.get(chunk_key)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._paths_by_chunk[chunk_key]
+
+    # Coordinates
+
+    def tile_of(self, world_point):
+        return (int(world_point[0] // self.tile_size[0]), int(world_point[1] // self.tile_size[1]))
+
+    def chunk_of(self, tile):
+        return (tile[0] // self.chunk_size[0], tile[1] // self.chunk_size[1])
+
+    def _mask(self, chunk_key):
+        # Read through World.walkable_mask so chunks far from the player aren't loaded into the world
+        if chunk_key in self._masks:
+            self._masks.move_to_end(chunk_key)
+        else:
+            self._masks[chunk_key] = self.world.walkable_mask(*chunk_key)
+            if len(self._masks) > self.chunk_cache_size:
+                self._masks.popitem(last=False)
+        return self._masks[chunk_key]
+
+    def walkable(self, tile):
+        mask = self._mask(self.chunk_of(tile))
+        if mask is None:
+            return False
+        return mask[(tile[1] % self.chunk_size[1]) * self.chunk_size[0] + tile[0] % self.chunk_size[0]] == 1
+
+    # Tile level, never leaves one chunk
+
+    def _flood(self, chunk_key, tile):
+        """Breadth-first walk inside a chunk; returns (distance, parent) lists by local index."""
+        width, height = self.chunk_size
+        mask = self._mask(chunk_key)
+        distance = [-1] * (width * height)
+        parent = [-1] * (width * height)
+        if mask is None:
+            return distance, parent
+        start = (tile[1] - chunk_key[1] * height) * width + tile[0] - chunk_key[0] * width
+        if not mask[start]:
+            return distance, parent
+
+        distance[start] = 0
+        queue = deque([start])
+        while queue:
+            index = queue.popleft()
+            col, row = index % width, index // width
+            for neighbour, inside in ((index - 1, col > 0), (index + 1, col < width - 1), (index - width, row > 0), (index + width, row < height - 1)):
+                if inside and mask[neighbour] and distance[neighbour] < 0:
+                    distance[neighbour] = distance[index] + 1
+                    parent[neighbour] = index
+                    queue.append(neighbour)
+        return distance, parent
+
+    def refine(self, start, goal):
+        """Tile steps from start to goal (excluding start) when both lie in one chunk or on
+        either side of a border; None if the segment is no longer walkable."""
+        chunk_key = self.chunk_of(start)
+        if self.chunk_of(goal) != chunk_key:
+            return [goal] if self.walkable(goal) else None
+
+        width = self.chunk_size[0]
+        origin = (chunk_key[0] * width, chunk_key[1] * self.chunk_size[1])
+        distance, parent = self._flood(chunk_key, start)
+        index = (goal[1] - origin[1]) * width + goal[0] - origin[0]
+        if distance[index] < 0:
+            return None
+        steps = []
+        while distance[index] > 0:
+            steps.append((origin[0] + index % width, origin[1] + index // width))
+            index = parent[index]
+        steps.reverse()
+        return steps
+
+    # Chunk level
+
+    def _graph(self, chunk_key):
+        graph = self._graphs.get(chunk_key)
+        if graph is None:
+            graph = self._build_graph(chunk_key)
+            self._graphs[chunk_key] = graph
+            if len(self._graphs) > self.chunk_cache_size:
+                del self._graphs[next(iter(self._graphs))]
+        return graph
+
+    def _border_portals(self, chunk_key, neighbour_key):
+        """(tile in chunk, tile in neighbour) for each walkable stretch of their shared border."""
+        width, height = self.chunk_size
+        mask, other = self._mask(chunk_key), self._mask(neighbour_key)
+        if mask is None or other is None:
+            return []
+        dx, dy = neighbour_key[0] - chunk_key[0], neighbour_key[1] - chunk_key[1]
+        origin = (chunk_key[0] * width, chunk_key[1] * height)
+
+        # Local (col, row) pairs along the border, one side in each chunk
+        if dx:
+            col, other_col = (width - 1, 0) if dx > 0 else (0, width - 1)
+            pairs = [((col, i), (other_col, i)) for i in range(height)]
+        else:
+            row, other_row = (height - 1, 0) if dy > 0 else (0, height - 1)
+            pairs = [((i, row), (i, other_row)) for i in range(width)]
+
+        portals = []
+        run = []
+        for pair in pairs + [None]:  # None closes the last stretch
+            if pair is not None and mask[pair[0][1] * width + pair[0][0]] and other[pair[1][1] * width + pair[1][0]]:
+                run.append(pair)
+                continue
+            if run:
+                inside, outside = run[len(run) // 2]
+                portals.append((
+                    (origin[0] + inside[0], origin[1] + inside[1]),
+                    (origin[0] + dx * width + outside[0], origin[1] + dy * height + outside[1]),
+                ))
+                run = []
+        return portals
+
+    def _build_graph(self, chunk_key):
+        graph = ChunkGraph()
+        chunk_x, chunk_y = chunk_key
+        for neighbour_key in ((chunk_x - 1, chunk_y), (chunk_x + 1, chunk_y), (chunk_x, chunk_y - 1), (chunk_x, chunk_y + 1)):
+            for inside, outside in self._border_portals(chunk_key, neighbour_key):
+                if inside not in graph.links:
+                    graph.portals.append(inside)
+                    graph.links[inside] = []
+                graph.links[inside].append((outside, 1))
+
+        # Walking distance between every pair of portals inside the chunk
+        width = self.chunk_size[0]
+        origin = (chunk_x * width, chunk_y * self.chunk_size[1])
+        for portal in graph.portals:
+            distance, _ = self._flood(chunk_key, portal)
+            for other in graph.portals:
+                cost = distance[(other[1] - origin[1]) * width + other[0] - origin[0]]
+                if other != portal and cost > 0:
+                    graph.links[portal].append((other, cost))
+        return graph
+
+    def _portal_costs(self, tile):
+        """Walking distance from a tile to each portal of its chunk."""
+        chunk_key = self.chunk_of(tile)
+        width = self.chunk_size[0]
+        origin = (chunk_key[0] * width, chunk_key[1] * self.chunk_size[1])
+        distance, _ = self._flood(chunk_key, tile)
+        costs = {}
+        for portal in self._graph(chunk_key).portals:
+            cost = distance[(portal[1] - origin[1]) * width + portal[0] - origin[0]]
+            if cost >= 0:
+                costs[portal] = cost
+        return costs, distance
@@ -0,0 +1,73 @@
+import pygame
+
+class DirtyRectPresenter:
+    """Tracks the screen regions that changed since the last frame and presents only those.
+
+    Each frame the renderer tracks every dynamic element (player, agents, hovered buttons,
+    dialogue box) under a key with its screen rect and a state value. Anything that moved,
+    changed state, appeared or disappeared marks its old and new rects dirty. A camera move
+    or an explicit force_full() falls back to a full redraw and display.flip().
+    """
+    def __init__(self):
+        self.full_redraw = True  # First frame is always drawn in full
+        self.rects = []
+        self.previous = {}  # key -> (rect, state) presented last frame
+        self.current = {}
+        self.camera_offset = None
+
+    def force_full(self):
+        """Redraw and flip the whole screen next frame (resize, overlays drawn outside render...)."""
+        self.full_redraw = True
+
+    def begin(self, camera_offset):
+        """Start tracking a frame; any camera scroll means everything on screen moved."""
+        self.current = {}
+        camera_offset = (camera_offset.x, camera_offset.y)
+        if camera_offset != self.camera_offset:
+            self.full_redraw = True
+            self.camera_offset = camera_offset
+
+    def mark(self, rect):
+        self.rects.append(pygame.Rect(rect))
+
+    def track(self, key, rect, state=None):
+        """Record where a dynamic element is drawn this frame."""
+        entry = (pygame.Rect(rect), state)
+        self.current[key] = entry
+        previous = self.previous.get(key)
+        if previous != entry:
+            if previous is not None:
+                self.rects.append(previous[0])
+            self.rects.append(entry[0])
+
+    def prepare(self, screen):
+        """Finish tracking; clip drawing to the dirty area and return False if nothing needs drawing."""
+        for key, (rect, _) in self.previous.items():
+            if key not in self.current:
+                self.rects.append(rect)  # Element disappeared, uncover what was behind it
+
+        if self.full_redraw:
+            screen.set_clip(None)
+            return True
+        if not self.rects:
+            return False
+
+        screen.set_clip(self.rects[0].unionall(self.rects[1:]))
+        return True
+
+    def present(self, screen):
+        """Put the dirty regions (or the whole frame) on screen."""
+        screen.set_clip(None)
+        if self.full_redraw:
+            pygame.display.flip()
+        elif self.rects:
+            screen_rect = screen.get_rect()
+            pygame.display.update([rect.clip(screen_rect) for rect in self.rects])
+
+        self.previous = self.current
+        self.rects = []
+        self.full_redraw = False
+
+def circle_rect(center, radius):
+    """Bounding rect of a circle drawn with pygame.draw.circle."""
+    return pygame.Rect(int(center[0]) - radius - 1, int(center[1]) - radius - 1, radius * 2 + 3, radius * 2 + 3)
@@ -0,0 +1,197 @@
+import csv
+import cProfile
+import time
+from collections import deque
+
+import pygame
+from fonts import get_font, render_text
+
+class _Phase:
+    """Context manager timing one phase of the frame."""
+    __slots__ = ("profiler", "name", "start")
+
+    def __init__(self, profiler, name):
+        self.profiler = profiler
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        timings = self.profiler.timings
+        timings[self.name] = timings.get(self.name, 0.0) + (time.perf_counter() - self.start) * 1000
+        return False
+
+class _NullPhase:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+_null_phase = _NullPhase()
+
+class FrameProfiler:
+    """Per-phase frame timings with rolling history, counters, an overlay and CSV/cProfile capture."""
+    def __init__(self, history=240):
+        self.enabled = False
+        self.overlay_visible = False
+        self.history = history
+        self.timings = {}  # phase -> ms, current frame
+        self.counters = {}  # name -> value, current frame
+        self.phase_history = {}  # phase -> deque of ms
+        self.frame_times = deque(maxlen=history)
+        self.frame_start = None
+        self.frame_index = 0
+
+        # Capture of a fixed number of frames to disk
+        self.capture_frames = 0
+        self.capture_path = None
+        self.capture_format = None
+        self._csv_rows = None  # Captured (frame, frame_ms, timings, counters), written on stop
+        self._cprofile = None
+
+        # Overlay text only changes a few times per second so the text cache isn't flooded
+        self._overlay_lines = []
+        self._overlay_updated = 0
+
+    def start_capture(self, frames, path, capture_format="csv"):
+        """Record the next `frames` frames as per-frame CSV rows or as a cProfile capture."""
+        self.enabled = True
+        self.capture_frames = frames
+        self.capture_path = path
+        self.capture_format = capture_format
+        if capture_format == "cprofile":
+            self._cprofile = cProfile.Profile()
+            self._cprofile.enable()
+        else:
+            self._csv_rows = []
+
+    def phase(self, name):
+        """Time a block: `with profiler.phase("draw_ui"): ...` (no-op while disabled)."""
+        if not self.enabled:
+            return _null_phase
+        return _Phase(self, name)
+
+    def count(self, name, amount=1):
+        if self.enabled:
+            self.counters[name] = self.counters.get(name, 0) + amount
+
+    def begin_frame(self):
+        self.timings = {}
+        self.counters = {}
+        self.frame_start = time.perf_counter()
+
+    def end_frame(self):
+        if not self.enabled or self.frame_start is None:
+            return
+        frame_ms = (time.perf_counter() - self.frame_start) * 1000
+        self.frame_times.append(frame_ms)
+        for name, ms in self.timings.items():
+            self.phase_history.setdefault(name, deque(maxlen=self.history)).append(ms)
+
+        if self.capture_frames > 0:
+            self._capture(frame_ms)
+        self.frame_index += 1
+
+    def _capture(self, frame_ms):
+        if self._csv_rows is not None:
+            self._csv_rows.append((self.frame_index, frame_ms, self.timings, self.counters))
+
+        self.capture_frames -= 1
+        if self.capture_frames == 0:
+            self.stop_capture()
+
+    def stop_capture(self):
+        if self._csv_rows is not None:
+            # Not every phase runs every frame (e.g. no simulation tick), so columns are the union
+            phases = sorted({name for _, _, timings, _ in self._csv_rows for name in timings})
+            counters = sorted({name for _, _, _, frame_counters in self._csv_rows for name in frame_counters})
+            with open(self.capture_path, "w", newline="") as file:
+                writer = csv.writer(file)
+                writer.writerow(["frame", "frame_ms"] + [f"{name}_ms" for name in phases] + counters)
+                for frame, frame_ms, timings, frame_counters in self._csv_rows:
+                    writer.writerow(
+                        [frame, round(frame_ms, 4)]
+                        + [round(timings.get(name, 0.0), 4) for name in phases]
+                        + [frame_counters.get(name, 0) for name in counters]
+                    )
+            self._csv_rows = None
+            print(f"Frame profile written to {self.capture_path}")
+        if self._cprofile is not None:
+            self._cprofile.disable()
+            self._cprofile.dump_stats(self.capture_path)
+            self._cprofile = None
+            print(f"cProfile capture written to {self.capture_path}")
+        self.capture_frames = 0
+        self.enabled = self.overlay_visible
+
+    def toggle_overlay(self):
+        self.overlay_visible = not self.overlay_visible
+        self.enabled = self.overlay_visible or self.capture_frames > 0
+
+    def overlay_rect(self):
+        """Screen area covered by the overlay (for dirty-rect presentation)."""
+        return pygame.Rect(5, 5, self.history + 200, 80 + 20 + 18 * len(self._overlay_lines))
+
+    def draw_overlay(self, screen):
+        """Rolling frame-time graph plus per-phase averages and counters."""
+        if not self.overlay_visible or not self.frame_times:
+            return
+        font = get_font(20)
+        graph_width, graph_height = self.history, 80
+        x, y = 10, 10
+        budget_ms = 1000 / 60
+
+        now = time.perf_counter()
+        if now - self._overlay_updated > 0.25:
+            self._overlay_updated = now
+            recent = list(self.frame_times)
+            self._overlay_lines = [f"frame {sum(recent) / len(recent):.2f} ms (max {max(recent):.2f})"]
+            for name, samples in sorted(self.phase_history.items(), key=lambda item: -sum(item[1])):
+                self._overlay_lines.append(f"{name:<16} {sum(samples) / len(samples):.2f} ms")
+            for name, value in sorted(self.counters.items()):
+                self._overlay_lines.append(f"{name:<16} {value}")
+
+        panel_height = graph_height + 10 + 18 * len(self._overlay_lines)
+        panel = pygame.Surface((graph_width + 200, panel_height + 10), pygame.SRCALPHA)
+        panel.fill((0, 0, 0, 170))
+        screen.blit(panel, (x - 5, y - 5))
+
+        # Frame-time graph, scaled so the 60 FPS budget sits at half height
+        scale = graph_height / (budget_ms * 2)
+        pygame.draw.line(screen, (80, 80, 80), (x, y + graph_height - budget_ms * scale), (x + graph_width, y + graph_height - budget_ms * scale))
+        for i, frame_ms in enumerate(self.frame_times):
+            bar = min(graph_height, frame_ms * scale)
+            color = (0, 200, 0) if frame_ms <= budget_ms else (230, 60, 60)
+            pygame.draw.line(screen, color, (x + i, y + graph_height), (x + i, y + graph_height - bar))
+
+        text_y = y + graph_height + 8
+        for line in self._overlay_lines:
+            screen.blit(render_text(font, line, (255, 255, 255)), (x, text_y))
+            text_y += 18
+
+class StartupTimer:
+    """Wall-clock sections from process start to the first presented frame."""
+    def __init__(self, start=None):
+        self.start = start if start is not None else time.perf_counter()
+        self.last = self.start
+        self.sections = []  # (name, ms) in the order they were marked
+
+    def mark(self, name):
+        """Close the section that started at the previous mark."""
+        now = time.perf_counter()
+        self.sections.append((name, (now - self.last) * 1000))
+        self.last = now
+
+    def report(self):
+        total = (self.last - self.start) * 1000
+        lines = [f"Time to first frame: {total:.1f} ms"]
+        for name, ms in self.sections:
+            lines.append(f"  {name:<12} {ms:8.1f} ms  {ms / total * 100 if total else 0:5.1f}%")
+        return "\n".join(lines)
+
+profiler = FrameProfiler()
@@ -0,0 +1,117 @@
+import json
+import struct
+import numpy as np
+
+# Wire format shared by server.py and remote.py. Every message is a frame:
+#   header:  payload length (uint32), message kind (uint8)
+#   payload: depends on the kind, little endian throughout
+# Chunks are sent as world_store records (the compiled world format) the first time a client
+# needs them and again whenever they are edited. After that a client only receives one TICK
+# per simulation tick holding the players near it and the NPCs that moved since its last TICK.
+PROTOCOL_VERSION = 1
+FRAME_HEADER = struct.Struct("<IB")
+
+MSG_HELLO = 1  # Server -> client, JSON: protocol version, client id, chunk and tile size, tick rate
+MSG_CHUNK = 2  # Server -> client: CHUNK_HEADER + world_store chunk record
+MSG_DROP = 3  # Server -> client: (chunk_x, chunk_y) pairs the client no longer needs
+MSG_TICK = 4  # Server -> client: TICK_HEADER, PLAYER_DTYPE rows, then per chunk CHUNK_AGENTS + AGENT_DTYPE rows
+MSG_POSITION = 5  # Client -> server: the player's position (POSITION)
+
+CHUNK_HEADER = struct.Struct("<iiI")  # chunk_x, chunk_y, Chunk.version
+CHUNK_KEY = struct.Struct("<ii")
+TICK_HEADER = struct.Struct("<IdHH")  # tick, simulated seconds, player count, chunk count
+CHUNK_AGENTS = struct.Struct("<iiH")  # chunk_x, chunk_y, agent count
+POSITION = struct.Struct("<ff")
+PLAYER_DTYPE = np.dtype([("id", "<u2"), ("x", "<f4"), ("y", "<f4")])
+# NPCs: index into Chunk.agents and position relative to the chunk's corner in 1/POSITION_SCALE pixels
+AGENT_DTYPE = np.dtype([("index", "<u2"), ("x", "<u2"), ("y", "<u2")])
+POSITION_SCALE = 64
+
+def parse_address(text):
+    """Parse "host:port" for TCP, anything else is a Unix socket path; returns (host, port) or the path."""
+    host, _, port = text.rpartition(":")
+    if host and port.isdigit():
+        return host, int(port)
+    return text
+
+def frame(kind, payload=b""):
+    return FRAME_HEADER.pack(len(payload), kind) + payload
+
+def hello_frame(client_id, chunk_size, tile_size, tick_rate):
+    return frame(MSG_HELLO, json.dumps({
+        "version": PROTOCOL_VERSION,
+        "client_id": client_id,
+        "chunk_size": list(chunk_size),
+        "tile_size": list(tile_size),
+        "tick_rate": tick_rate,
+    }).encode("utf-8"))
+
+def chunk_frame(key, version, record):
+    return frame(MSG_CHUNK, CHUNK_HEADER.pack(key[0], key[1], version) + record)
+
+def drop_frame(keys):
+    return frame(MSG_DROP, b"".join(CHUNK_KEY.pack(*key) for key in keys))
+
+def tick_frame(tick, sim_time, players, chunks):
+    """players is a PLAYER_DTYPE array, chunks a list of (key, AGENT_DTYPE array)."""
+    parts = [TICK_HEADER.pack(tick, sim_time, len(players), len(chunks)), players.tobytes()]
+    for key, agents in chunks:
+        parts.append(CHUNK_AGENTS.pack(key[0], key[1], len(agents)))
+        parts.append(agents.tobytes())
+    return frame(MSG_TICK, b"".join(parts))
+
+def pack_agents(indices, positions, origin):
+    """AGENT_DTYPE rows for NPCs at world-space positions (N x 2) in the chunk whose corner is at origin."""
+    agents = np.empty(len(indices), dtype=AGENT_DTYPE)
+    agents["index"] = indices
+    local = np.clip(np.rint((positions - origin) * POSITION_SCALE), 0, 0xFFFF)
+    agents["x"], agents["y"] = local[:, 0], local[:, 1]
+    return agents
+
+def unpack_positions(agents, origin):
+    """World-space positions (N x 2) of AGENT_DTYPE rows."""
+    return np.column_stack((agents["x"], agents["y"])).astype(np.float32) / POSITION_SCALE + np.asarray(origin, dtype=np.float32)
+
+def position_frame(position):
+    return frame(MSG_POSITION, POSITION.pack(position[0], position[1]))
+
+def decode_drop(payload):
+    return list(CHUNK_KEY.iter_unpack(payload))
+
+def decode_tick(payload):
+    """Inverse of tick_frame: (tick, sim_time, players, [(key, agents)])."""
+    tick, sim_time, player_count, chunk_count = TICK_HEADER.unpack_from(payload, 0)
+    offset = TICK_HEADER.size
+    players = np.frombuffer(payload, PLAYER_DTYPE, player_count, offset)
+    offset += players.nbytes
+    chunks = []
+    for _ in range(chunk_count):
+        chunk_x, chunk_y, count = CHUNK_AGENTS.unpack_from(payload, offset)
+        offset += CHUNK_AGENTS.size
+        agents = np.frombuffer(payload, AGENT_DTYPE, count, offset)
+        offset += agents.nbytes
+        chunks.append(((chunk_x, chunk_y), agents))
+    return tick, sim_time, players, chunks
+
+class FrameReader:
+    """Splits a byte stream (read in arbitrary pieces) back into (kind, payload) frames."""
+    def __init__(self):
+        self.buffer = bytearray()
+
+    def feed(self, data):
+        self.buffer += data
+
+    def frames(self):
+        while len(self.buffer) >= FRAME_HEADER.size:
+            length, kind = FRAME_HEADER.unpack_from(self.buffer, 0)
+            end = FRAME_HEADER.size + length
+            if len(self.buffer) < end:
+                break
+            payload = bytes(self.buffer[FRAME_HEADER.size:end])
+            del self.buffer[:end]
+            yield kind, payload
+
+async def read_frame(reader):
+    """Read one frame from an asyncio StreamReader."""
+    length, kind = FRAME_HEADER.unpack(await reader.readexactly(FRAME_HEADER.size))
+    return kind, await reader.readexactly(length)
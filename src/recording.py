@@ -0,0 +1,135 @@
+import json
+import hashlib
+import random
+import pygame
+from agent_system import agent_system
+from scenes import scene_stack
+
+# Input recordings are JSON lines: a header, then one line per rendered frame with the frame
+# time that frame simulated, the pressed keys and the events polled. Replaying the same
+# lines through the same code paths reproduces the session tick for tick.
+RECORDING_VERSION = 1
+
+# Only events the game reacts to are recorded; window-manager chatter is left out
+recorded_event_types = {
+    pygame.QUIT, pygame.VIDEORESIZE,
+    pygame.KEYDOWN, pygame.KEYUP, pygame.TEXTINPUT,
+    pygame.MOUSEBUTTONDOWN, pygame.MOUSEBUTTONUP, pygame.MOUSEMOTION, pygame.MOUSEWHEEL,
+}
+all_keys = sorted({getattr(pygame, name) for name in dir(pygame) if name.startswith("K_")})
+
+class KeyState:
+    """Stand-in for pygame.key.get_pressed() built from a set of key codes."""
+    __slots__ = ("pressed",)
+
+    def __init__(self, pressed):
+        self.pressed = pressed
+
+    def __getitem__(self, key):
+        return key in self.pressed
+
+class LiveInput:
+    """Input straight from pygame."""
+    dialogue_seed = None  # Dialogue lines are picked with the default random state
+
+    def next_frame(self, frame_time):
+        """Poll the events for the coming frame; returns (events, seconds of simulation to run)."""
+        return pygame.event.get(), frame_time
+
+    def key_state(self):
+        return pygame.key.get_pressed()
+
+    def close(self):
+        pass
+
+class InputRecorder(LiveInput):
+    """Live input, written to a recording as it is used."""
+    def __init__(self, path, screen_size, world_seed=None):
+        self.dialogue_seed = random.randrange(2 ** 32)
+        self._file = open(path, "w")
+        self._write({
+            "version": RECORDING_VERSION,
+            "screen_size": list(screen_size),
+            "world_seed": world_seed,
+            "dialogue_seed": self.dialogue_seed,
+        })
+
+    def _write(self, line):
+        self._file.write(json.dumps(line, separators=(",", ":")) + "\n")
+
+    def next_frame(self, frame_time):
+        events, frame_time = super().next_frame(frame_time)
+        pressed = pygame.key.get_pressed()
+        self._write({
+            "dt": frame_time,
+            "keys": [key for key in all_keys if pressed[key]],
+            "events": [encode_event(event) for event in events if event.type in recorded_event_types],
+        })
+        return events, frame_time
+
+    def close(self):
+        self._file.close()
+
+class ReplayInput:
+    """Recorded input played back; ends with a QUIT event once the recording runs out."""
+    def __init__(self, path):
+        with open(path, "r") as file:
+            header = json.loads(file.readline())
+            if header.get("version") != RECORDING_VERSION:
+                raise ValueError(f"{path} is not a version {RECORDING_VERSION} input recording")
+            self.frames = [json.loads(line) for line in file if line.strip()]
+        self.screen_size = header["screen_size"]
+        self.world_seed = header["world_seed"]
+        self.dialogue_seed = header["dialogue_seed"]
+        self.frame_index = 0
+        self._keys = KeyState(frozenset())
+
+    def __len__(self):
+        return len(self.frames)
+
+    def next_frame(self, frame_time):
+        pygame.event.pump()  # Keep the (headless) window responsive; live events are ignored
+        if self.frame_index >= len(self.frames):
+            return [pygame.event.Event(pygame.QUIT)], 0
+        frame = self.frames[self.frame_index]
+        self.frame_index += 1
+        self._keys = KeyState(frozenset(frame["keys"]))
+        return [decode_event(data) for data in frame["events"]], frame["dt"]
+
+    def key_state(self):
+        return self._keys
+
+    def close(self):
+        pass
+
+def encode_event(event):
+    attributes = {}
+    for name, value in event.dict.items():
+        if isinstance(value, (bool, int, float, str)) or value is None:
+            attributes[name] = value
+        elif isinstance(value, (tuple, list)):
+            attributes[name] = list(value)
+    return [event.type, attributes]
+
+def decode_event(data):
+    event_type, attributes = data
+    for name in ("pos", "rel", "size"):
+        if name in attributes:
+            attributes[name] = tuple(attributes[name])
+    return pygame.event.Event(event_type, attributes)
+
+def state_hash(player_pos, sim_time, game_state, world):
+    """Digest of everything the simulation decides, to compare replays across builds."""
+    digest = hashlib.sha256()
+    digest.update(repr((round(player_pos[0], 4), round(player_pos[1], 4), round(sim_time, 6))).encode())
+    digest.update(json.dumps(game_state.snapshot(), sort_keys=True).encode())
+    digest.update(repr([type(scene).__name__ for scene in scene_stack]).encode())
+
+    count = agent_system.count
+    for array in (agent_system.positions, agent_system.state, agent_system.profession):
+        digest.update(array[:count].tobytes())
+    for key in sorted(world.dirty_chunks):
+        chunk = world.chunks.get(key)
+        if chunk is not None:
+            digest.update(repr(key).encode() + chunk.tile_ids.tobytes())
+    return digest.hexdigest()
@@ -0,0 +1,185 @@
+import json
+import time
+import socket
+import numpy as np
+from world_store import decode_chunk
+from agent_system import agent_system
+from protocol import (
+    PROTOCOL_VERSION, MSG_HELLO, MSG_CHUNK, MSG_DROP, MSG_TICK, CHUNK_HEADER,
+    FrameReader, parse_address, position_frame, decode_drop, decode_tick, unpack_positions,
+)
+
+# Client side of server.py: the game runs its usual World on top of the chunks the server sends,
+# and NPC positions come from the server's ticks instead of the local agent_system.update.
+
+class RemoteChunkSource:
+    """Chunk records received from the server, behind the ChunkStore has/load interface."""
+    def __init__(self, chunk_size):
+        self.chunk_size = chunk_size
+        self.records = {}  # (chunk_x, chunk_y) -> (tiles, room identifier, agents data)
+
+    def has(self, chunk_x, chunk_y):
+        return (chunk_x, chunk_y) in self.records
+
+    def load(self, chunk_x, chunk_y):
+        return self.records.get((chunk_x, chunk_y))
+
+class ServerConnection:
+    """Connection to a simulation server, polled once per tick without blocking."""
+    def __init__(self, address, timeout=5):
+        address = parse_address(address)
+        if isinstance(address, tuple):
+            self.sock = socket.create_connection(address, timeout=timeout)
+            self.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)  # Positions are tiny, don't batch them
+        else:
+            self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            self.sock.settimeout(timeout)
+            self.sock.connect(address)
+        self.reader = FrameReader()
+
+        hello = self._read_hello()
+        if hello.get("version") != PROTOCOL_VERSION:
+            raise ConnectionError(f"server speaks protocol version {hello.get('version')}, not {PROTOCOL_VERSION}")
+        self.sock.setblocking(False)
+
+        self.client_id = hello["client_id"]
+        self.chunk_size = tuple(hello["chunk_size"])
+        self.tile_size = tuple(hello["tile_size"])
+        self.tick_rate = hello["tick_rate"]
+        self.source = RemoteChunkSource(self.chunk_size)
+        self.world = None  # Set with attach
+        self.tick = 0  # Last server tick received
+        self.players = {}  # Other players near us: client id -> (x, y)
+        self.connected = True
+        self.bytes_received = 0
+
+        self._sent_position = None
+        self._outgoing = bytearray()  # Part of a position report the socket hasn't taken yet
+        self._positions = {}  # (chunk_x, chunk_y) -> latest NPC positions from the server (N x 2)
+        self._synced = {}  # (chunk_x, chunk_y) -> Chunk whose spawned NPCs were given those positions
+
+    def _read_hello(self):
+        while True:
+            data = self.sock.recv(65536)
+            if not data:
+                raise ConnectionError("server closed the connection")
+            self.reader.feed(data)
+            for kind, payload in self.reader.frames():
+                if kind == MSG_HELLO:
+                    return json.loads(payload)
+
+    def attach(self, world):
+        """Use a World built on self.source; its chunks and NPCs are kept in sync from now on."""
+        if world.chunk_pixel_size != (self.chunk_size[0] * self.tile_size[0], self.chunk_size[1] * self.tile_size[1]):
+            raise ValueError("server chunk and tile size don't match this build")
+        self.world = world
+
+    def wait_for_world(self, player_pos, timeout=5):
+        """Block until the first tick (and so the chunks around the player) has arrived."""
+        deadline = time.perf_counter() + timeout
+        while self.tick == 0 and self.connected and time.perf_counter() < deadline:
+            self.poll(player_pos)
+            time.sleep(0.005)
+
+    def poll(self, player_pos):
+        """Report the player's position and apply everything the server sent since the last poll."""
+        position = (float(player_pos[0]), float(player_pos[1]))
+        if position != self._sent_position and not self._outgoing:
+            # While a report is still stuck in the socket buffer newer positions are skipped, not queued
+            self._outgoing += position_frame(position)
+            self._sent_position = position
+        if self._outgoing and self.connected:
+            try:
+                del self._outgoing[:self.sock.send(self._outgoing)]
+            except BlockingIOError:
+                pass
+            except OSError:
+                self.connected = False
+
+        while self.connected:
+            try:
+                data = self.sock.recv(65536)
+            except BlockingIOError:
+                break
+            except OSError:
+                data = b""
+            if not data:
+                self.connected = False
+                print("Disconnected from the server")
+                break
+            self.bytes_received += len(data)
+            self.reader.feed(data)
+
+        for kind, payload in self.reader.frames():
+            if kind == MSG_CHUNK:
+                self._apply_chunk(payload)
+            elif kind == MSG_DROP:
+                for key in decode_drop(payload):
+                    self.source.records.pop(key, None)
+                    self._positions.pop(key, None)
+            elif kind == MSG_TICK:
+                self._apply_tick(payload)
+        self._sync_agents()
+
+    def _apply_chunk(self, payload):
+        chunk_x, chunk_y, version = CHUNK_HEADER.unpack_from(payload, 0)
+        key = (chunk_x, chunk_y)
+        tiles, room_identifier, agents_data = decode_chunk(payload, CHUNK_HEADER.size, self.chunk_size)
+        self.source.records[key] = (tiles, room_identifier, agents_data)
+
+        # The record has the NPCs where the server has them now
+        world = self.world
+        self._positions[key] = np.array([
+            (
+                chunk_x * world.chunk_pixel_size[0] + agent["tile"][0] * self.tile_size[0] + agent["tile_offset"][0],
+                chunk_y * world.chunk_pixel_size[1] + agent["tile"][1] * self.tile_size[1] + agent["tile_offset"][1],
+            )
+            for agent in agents_data
+        ], dtype=np.float32).reshape(-1, 2)
+        self._synced.pop(key, None)
+
+        chunk = world.chunks.get(key)
+        if chunk is None:
+            world.pathfinder.invalidate_chunk(chunk_x, chunk_y)  # Masks are read from the records too
+            world.refresh_visible()  # So the chunk is picked up even if the player stays put
+            return
+
+        # A chunk we already built (edited, or sent again after leaving and re-entering the area):
+        # apply the changed tiles like a local edit
+        old_tiles = chunk.tile_ids.tobytes()
+        width = self.chunk_size[0]
+        for index in range(len(tiles)):
+            if tiles[index] != old_tiles[index]:
+                col, row = index % width, index // width
+                world.set_tile((
+                    chunk.chunk_position[0] + (col + 0.5) * self.tile_size[0],
+                    chunk.chunk_position[1] + (row + 0.5) * self.tile_size[1],
+                ), tiles[index])
+
+    def _apply_tick(self, payload):
+        self.tick, _, players, chunks = decode_tick(payload)
+        self.players = {int(player["id"]): (float(player["x"]), float(player["y"])) for player in players}
+        for key, agents in chunks:
+            positions = self._positions.get(key)
+            if positions is None:
+                continue
+            origin = (key[0] * self.world.chunk_pixel_size[0], key[1] * self.world.chunk_pixel_size[1])
+            positions[agents["index"]] = unpack_positions(agents, origin)
+            self._synced.pop(key, None)
+
+    def _sync_agents(self):
+        """Move the NPCs of every loaded chunk whose positions changed (or that just spawned)."""
+        world = self.world
+        for key, positions in self._positions.items():
+            chunk = world.chunks.get(key)
+            if chunk is None or chunk.agents_data is not None or self._synced.get(key) is chunk:
+                continue  # Not loaded, NPCs not spawned yet, or already up to date
+            slots = [agent.slot for agent in chunk.agents]
+            agent_system.positions[slots] = positions[:len(slots)]
+            for agent in chunk.agents:
+                world.agent_index.refresh(agent)
+            self._synced[key] = chunk
+
+    def close(self):
+        self.sock.close()
+        self.connected = False
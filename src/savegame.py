@@ -0,0 +1,152 @@
+import os
+import json
+from concurrent.futures import ThreadPoolExecutor, wait
+from world_store import ChunkStore, encode_chunk, write_chunks
+from worldgen import LayeredChunkSource
+
+# A save slot is a directory holding:
+#   manifest.json     versioned game state plus the list of chunk segments, oldest first
+#   chunks-NNNNNN.bin chunks edited since the previous save, in the compiled world format
+# Every file is written to a temporary name and moved into place with os.replace, and the
+# manifest is replaced last, so a crash mid-save leaves the previous save intact.
+SAVE_VERSION = 1
+MANIFEST_NAME = "manifest.json"
+
+root = os.path.dirname(os.path.realpath(__file__))
+default_save_path = os.path.join(root, "saves", "autosave")
+
+class SaveSlot:
+    """Incremental saves of the game state and edited chunks, written on a background thread."""
+    def __init__(self, path, chunk_size=(10, 10), max_segments=8, new_game=False):
+        self.path = path
+        self.chunk_size = chunk_size
+        self.max_segments = max_segments  # Segments are merged into one when there are more
+
+        self.manifest = None if new_game else self._read_manifest()
+        if self.manifest is None:
+            self.manifest = {"version": SAVE_VERSION, "state": None, "segments": []}
+        self._next_segment = 1 + max((int(name[7:13]) for name in self._segment_files()), default=0)
+
+        self._saved_versions = {}  # (chunk_x, chunk_y) -> Chunk.version at the last snapshot
+        self._writer = ThreadPoolExecutor(max_workers=1)
+        self._pending = None  # Future of the save being written
+
+    def _read_manifest(self):
+        try:
+            with open(os.path.join(self.path, MANIFEST_NAME), "r") as file:
+                manifest = json.load(file)
+        except (OSError, ValueError):
+            return None
+        if manifest.get("version") != SAVE_VERSION:
+            print(f"Ignoring save {self.path}: version {manifest.get('version')} is not supported")
+            return None
+        return manifest
+
+    def _segment_files(self):
+        if not os.path.isdir(self.path):
+            return []
+        return [name for name in os.listdir(self.path) if name.startswith("chunks-") and name.endswith(".bin")]
+
+    @property
+    def state(self):
+        """Game state of the last completed save, or None for a new game."""
+        return self.manifest["state"]
+
+    def chunk_source(self):
+        """Saved chunks as a chunk source (newest segment first), or None if nothing was saved."""
+        stores = [ChunkStore(os.path.join(self.path, name)) for name in reversed(self.manifest["segments"])]
+        if not stores:
+            return None
+        return LayeredChunkSource(*stores) if len(stores) > 1 else stores[0]
+
+    def snapshot(self, world, game_state, player_pos):
+        """Copy what changed since the last snapshot; only touches chunks edited since then."""
+        chunks = {}
+        for key in world.dirty_chunks:
+            chunk = world.chunks.get(key)
+            if chunk is None or self._saved_versions.get(key) == chunk.version:
+                continue
+            chunks[key] = encode_chunk(chunk.tile_ids.tobytes(), chunk.chunk_roomIdentifier, chunk.agents_json(), self.chunk_size)
+            self._saved_versions[key] = chunk.version
+        state = {"player": [player_pos[0], player_pos[1]], "game_state": game_state.snapshot()}
+        return state, chunks
+
+    def save_async(self, world, game_state, player_pos):
+        """Start a background save; returns False if the previous one is still being written."""
+        if self._pending is not None:
+            if not self._pending.done():
+                return False
+            if self._report_failure():
+                # Nothing from the failed save can be trusted to be on disk, write every edited chunk again
+                self._saved_versions.clear()
+
+        state, chunks = self.snapshot(world, game_state, player_pos)
+        self._pending = self._writer.submit(self._write, state, chunks)
+        return True
+
+    def _report_failure(self):
+        error = self._pending.exception()
+        if error is not None:
+            print(f"Saving to {self.path} failed: {error}")
+        return error is not None
+
+    def wait(self):
+        """Block until the save being written (if any) has finished."""
+        if self._pending is not None:
+            wait([self._pending])
+
+    def close(self):
+        """Finish the pending save and stop the writer thread."""
+        self._writer.shutdown(wait=True)
+        if self._pending is not None:
+            self._report_failure()
+            self._pending = None
+
+    def _write(self, state, chunks):
+        """Write a delta segment and the new manifest (runs on the writer thread)."""
+        if not chunks and state == self.manifest["state"]:
+            return
+        os.makedirs(self.path, exist_ok=True)
+
+        segments = list(self.manifest["segments"])
+        if chunks:
+            segments.append(self._write_segment(chunks.items()))
+        if len(segments) > self.max_segments:
+            segments = [self._compact(segments)]
+
+        manifest = {"version": SAVE_VERSION, "state": state, "segments": segments}
+        tmp_path = os.path.join(self.path, MANIFEST_NAME + ".tmp")
+        with open(tmp_path, "w") as file:
+            json.dump(manifest, file, separators=(",", ":"))
+        os.replace(tmp_path, os.path.join(self.path, MANIFEST_NAME))
+        self.manifest = manifest
+
+        # Segments dropped by compaction or left over from a previous game
+        for name in set(self._segment_files()) - set(segments):
+            try:
+                os.remove(os.path.join(self.path, name))
+            except OSError:
+                pass  # Still mapped on platforms that lock open files; removed by a later save
+
+    def _write_segment(self, records):
+        name = f"chunks-{self._next_segment:06d}.bin"
+        self._next_segment += 1
+        write_chunks(records, os.path.join(self.path, name), self.chunk_size)
+        return name
+
+    def _compact(self, segments):
+        """Merge segments into one, newer chunks replacing older ones."""
+        stores = [ChunkStore(os.path.join(self.path, name)) for name in segments]
+        try:
+            latest = {}  # (chunk_x, chunk_y) -> store holding the newest copy
+            for store in stores:
+                for key in store.coords():
+                    latest[key] = store
+            records = (
+                (key, encode_chunk(*store.load(*key), self.chunk_size))
+                for key, store in sorted(latest.items())
+            )
+            return self._write_segment(records)
+        finally:
+            for store in stores:
+                store.close()
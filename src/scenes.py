@@ -0,0 +1,70 @@
+# Scene / overlay stack driven by the main loop. Scenes are drawn bottom to top on top of
+# the world and get input top to bottom, so the frontmost overlay sees events first.
+import pygame
+
+# Events a capturing scene keeps from the world; window events always get through
+input_event_types = {
+    pygame.KEYDOWN, pygame.KEYUP, pygame.TEXTINPUT,
+    pygame.MOUSEBUTTONDOWN, pygame.MOUSEBUTTONUP, pygame.MOUSEMOTION, pygame.MOUSEWHEEL,
+}
+
+class Scene:
+    """Base class for overlays such as dialogue, the store, inventory or the map."""
+    captures_input = False  # True: events stop here and never reach scenes below or the world
+
+    def handle_event(self, event, game_state):
+        """Return True to consume the event."""
+        return False
+
+    def update(self, dt, game_state):
+        pass
+
+    def draw(self, screen):
+        pass
+
+    def dirty_region(self, screen):
+        """(rect, state) for dirty-rect presentation; state changes whenever the drawing would."""
+        return screen.get_rect(), None
+
+class SceneStack:
+    def __init__(self):
+        self.scenes = []
+
+    def __len__(self):
+        return len(self.scenes)
+
+    def __iter__(self):
+        return iter(self.scenes)
+
+    @property
+    def top(self):
+        return self.scenes[-1] if self.scenes else None
+
+    def push(self, scene):
+        self.scenes.append(scene)
+
+    def pop(self):
+        return self.scenes.pop() if self.scenes else None
+
+    def remove(self, scene):
+        if scene in self.scenes:
+            self.scenes.remove(scene)
+
+    def handle_event(self, event, game_state):
+        """Offer an event to scenes from the top down; returns True if a scene consumed or captured it."""
+        for scene in self.scenes[::-1]:
+            if scene.handle_event(event, game_state):
+                return True
+            if scene.captures_input and event.type in input_event_types:
+                return True
+        return False
+
+    def update(self, dt, game_state):
+        for scene in list(self.scenes):
+            scene.update(dt, game_state)
+
+    def draw(self, screen):
+        for scene in self.scenes:
+            scene.draw(screen)
+
+scene_stack = SceneStack()
@@ -0,0 +1,233 @@
+import asyncio
+import argparse
+import time
+import numpy as np
+from world import world_generation, render_distance, chunk_size, tile_size
+from world_store import encode_chunk
+from agent_system import agent_system
+from game_state import GameState
+from protocol import (
+    MSG_POSITION, POSITION, PLAYER_DTYPE,
+    parse_address, read_frame, hello_frame, chunk_frame, drop_frame, tick_frame, pack_agents,
+)
+
+# Headless simulation server: owns the world, its NPCs and the game state and ticks them at a
+# fixed rate. Clients (the game started with --connect, or bench.clients) report where their
+# player is and get the chunks around it plus a compact delta every tick; see protocol.py.
+
+class ClientSession:
+    """What the server knows about one connected client and what it has already sent it."""
+    def __init__(self, client_id, writer):
+        self.client_id = client_id
+        self.writer = writer
+        self.position = None  # Player position; nothing is streamed until the first report
+        self.chunks = []  # Chunks within the interest distance this tick
+        self.center = None  # Chunk the player is in
+        self.sent_center = None  # Chunk the player was in when far chunks were last dropped
+        self.sent_versions = {}  # (chunk_x, chunk_y) -> Chunk.version the client holds
+        self.last_tick = 0  # Tick of the last delta sent
+        self.bytes_sent = 0
+
+    def send(self, data):
+        self.writer.write(data)
+        self.bytes_sent += len(data)
+
+class SimulationServer:
+    def __init__(self, world, tick_rate=30, interest_distance=render_distance + 1, max_buffered=256 * 1024):
+        self.world = world
+        self.tick_rate = tick_rate
+        self.dt = 1 / tick_rate
+        self.interest_distance = interest_distance  # Chunks streamed around each player: the view plus its prefetch ring
+        self.max_buffered = max_buffered  # Skip a tick's delta for clients whose socket is this far behind
+        self.sessions = {}  # client id -> ClientSession
+        self.tick = 0
+        self.sim_time = 0
+        self.tick_ms = 0  # Duration of the last tick, for the status line
+        self.bytes_sent = 0  # Delta traffic to every client so far
+        self._next_client_id = 1
+        self._centers = []  # Chunks the players were in when the world was last streamed
+        self._moved_tick = np.zeros(0, dtype=np.uint32)  # agent_system slot -> tick it last moved
+        self._stamped = np.zeros((0, 2), dtype=np.float32)  # agent_system slot -> position at that tick
+        self._records = {}  # (chunk_x, chunk_y) -> CHUNK message built this tick
+        self._deltas = {}  # ((chunk_x, chunk_y), since tick) -> NPCs of the chunk that moved, this tick
+
+    async def serve(self, address):
+        """Listen on a "host:port" TCP address or a Unix socket path and tick until cancelled."""
+        address = parse_address(address)
+        if isinstance(address, tuple):
+            server = await asyncio.start_server(self._serve_client, *address)
+        else:
+            server = await asyncio.start_unix_server(self._serve_client, address)
+        async with server:
+            for sock in server.sockets:
+                print(f"Listening on {sock.getsockname()}")
+            await self.run()
+
+    async def run(self):
+        """Tick at the fixed rate; time lost to long hitches is dropped instead of caught up."""
+        loop = asyncio.get_running_loop()
+        next_tick = loop.time()
+        while True:
+            start = time.perf_counter()
+            self.step()
+            self.tick_ms = (time.perf_counter() - start) * 1000
+
+            next_tick += self.dt
+            delay = next_tick - loop.time()
+            if delay < -0.25:
+                next_tick = loop.time()
+            await asyncio.sleep(max(delay, 0))
+
+    async def _serve_client(self, reader, writer):
+        session = ClientSession(self._next_client_id, writer)
+        self._next_client_id += 1
+        self.sessions[session.client_id] = session
+        session.send(hello_frame(session.client_id, chunk_size, tile_size, self.tick_rate))
+        try:
+            while True:
+                kind, payload = await read_frame(reader)
+                if kind == MSG_POSITION:
+                    session.position = POSITION.unpack(payload)
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass  # Client went away
+        finally:
+            del self.sessions[session.client_id]
+            writer.close()
+
+    def step(self):
+        """Advance the simulation one tick and send every client its delta."""
+        self.tick += 1
+        self.sim_time += self.dt
+        world = self.world
+
+        # Keep the chunks around every player loaded; the rest is streamed out as usual
+        active = [session for session in self.sessions.values() if session.position is not None]
+        for session in active:
+            center = world.chunk_coords(session.position)
+            if center != session.center:
+                session.center = center
+                session.chunks = world.chunks_around(center, self.interest_distance)
+        centers = sorted({session.center for session in active})
+        if centers != self._centers:
+            self._centers = centers
+            world.stream_around(centers, self.interest_distance)
+
+        world.update_agents(self.dt, [session.position for session in active] or None)
+        world.pathfinder.process(budget_ms=1.0)
+        self._track_moves()
+
+        players = np.array(
+            [(session.client_id, *session.position) for session in active], dtype=PLAYER_DTYPE
+        )
+        self._records = {}
+        self._deltas = {}
+        for session in active:
+            if session.writer.is_closing() or session.writer.transport.get_write_buffer_size() > self.max_buffered:
+                continue  # Deltas cover everything since the last one sent, so the next one catches up
+            data = self._delta(session, players)
+            session.send(data)
+            session.last_tick = self.tick
+            self.bytes_sent += len(data)
+
+    def _track_moves(self):
+        """Stamp the NPCs that moved noticeably since they were last stamped with this tick."""
+        count = agent_system.count
+        if len(self._moved_tick) < count:
+            grow = count - len(self._moved_tick)
+            self._moved_tick = np.concatenate([self._moved_tick, np.zeros(grow, dtype=np.uint32)])
+            self._stamped = np.concatenate([self._stamped, np.zeros((grow, 2), dtype=np.float32)])
+        positions = agent_system.positions[:count]
+        moved = (np.abs(positions - self._stamped[:count]) > 0.01).any(axis=1)
+        self._moved_tick[:count][moved] = self.tick
+        self._stamped[:count][moved] = positions[moved]
+
+    def _moved_agents(self, chunk, since):
+        """AGENT_DTYPE rows for a chunk's NPCs that moved after tick `since`, or None.
+
+        Cached for the tick: every client that got the previous tick's delta shares the result.
+        """
+        key = (chunk.chunk_coords, since)
+        if key not in self._deltas:
+            slots = np.fromiter((agent.slot for agent in chunk.agents), dtype=np.intp, count=len(chunk.agents))
+            changed = np.nonzero(self._moved_tick[slots] > since)[0]
+            self._deltas[key] = pack_agents(changed, agent_system.positions[slots[changed]], chunk.chunk_position) if len(changed) else None
+        return self._deltas[key]
+
+    def _record(self, chunk):
+        """CHUNK message for a chunk as it is now (cached for the tick, clients entering together share it)."""
+        data = self._records.get(chunk.chunk_coords)
+        if data is None:
+            record = encode_chunk(chunk.tile_ids.tobytes(), chunk.chunk_roomIdentifier, chunk.agents_json(), chunk_size)
+            data = chunk_frame(chunk.chunk_coords, chunk.version, record)
+            self._records[chunk.chunk_coords] = data
+        return data
+
+    def _delta(self, session, players):
+        """Everything a client needs this tick, as one buffer."""
+        parts = []
+        center = session.center
+        if center != session.sent_center:
+            session.sent_center = center
+            keep_distance = self.interest_distance + 1  # Hysteresis so chunks on the edge aren't resent
+            far = [
+                key for key in session.sent_versions
+                if max(abs(key[0] - center[0]), abs(key[1] - center[1])) > keep_distance
+            ]
+            if far:
+                for key in far:
+                    del session.sent_versions[key]
+                parts.append(drop_frame(far))
+
+        moved = []
+        for chunk in session.chunks:
+            key = chunk.chunk_coords
+            if session.sent_versions.get(key) != chunk.version:
+                # New or edited chunk: the record carries the tiles and the NPCs where they are now
+                parts.append(self._record(chunk))
+                session.sent_versions[key] = chunk.version
+                continue
+            if chunk.agents:
+                agents = self._moved_agents(chunk, session.last_tick)
+                if agents is not None:
+                    moved.append((key, agents))
+
+        # Other players are only of interest once their circle could be on this client's screen
+        nearby = players[
+            (players["id"] != session.client_id)
+            & (np.abs(players["x"] // self.world.chunk_pixel_size[0] - center[0]) <= self.interest_distance)
+            & (np.abs(players["y"] // self.world.chunk_pixel_size[1] - center[1]) <= self.interest_distance)
+        ]
+        parts.append(tick_frame(self.tick, self.sim_time, nearby, moved))
+        return b"".join(parts)
+
+async def report_status(server, interval):
+    """Print tick timing and traffic every interval seconds."""
+    last_bytes = 0
+    while True:
+        await asyncio.sleep(interval)
+        print(
+            f"tick {server.tick}: {len(server.sessions)} clients, {len(server.world)} chunks, "
+            f"{len(agent_system)} NPCs, {server.tick_ms:.2f} ms/tick, {(server.bytes_sent - last_bytes) / interval / 1024:.1f} KiB/s"
+        )
+        last_bytes = server.bytes_sent
+
+async def main(args):
+    world = world_generation(GameState(), args.seed)
+    server = SimulationServer(world, tick_rate=args.tick_rate)
+    if args.status:
+        asyncio.create_task(report_status(server, args.status))
+    try:
+        await server.serve(args.address)
+    finally:
+        world.close()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run the world headless and stream it to clients.")
+    parser.add_argument('--address', default="127.0.0.1:7777", help="host:port to listen on, or a Unix socket path")
+    parser.add_argument('--tick-rate', type=int, default=30, help="simulation ticks (and deltas sent) per second")
+    parser.add_argument('--seed', type=int, help="generate chunks beyond the hand-authored world from this seed")
+    parser.add_argument('--status', type=float, default=5, metavar="SECONDS", help="status line interval, 0 for none")
+    try:
+        asyncio.run(main(parser.parse_args()))
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,104 @@
+import math
+import pygame
+from world import surface_cache, tile_size
+
+class Viewport:
+    """Scrolling back-buffer of the static world layer.
+
+    The buffer is one tile larger than the screen on every side and aligned to the tile grid.
+    When the camera crosses a tile boundary the buffer is scrolled in place and only the newly
+    exposed rows/columns are drawn (blitted from the baked chunk surfaces). Chunks entering or
+    leaving the visible set, or edited since they were drawn, are redrawn individually.
+    """
+    def __init__(self, margin=None):
+        self.margin = margin or tile_size  # Extra pixels around the screen on each side
+        self.buffer = None
+        self.origin = None  # World position of the buffer's top-left corner
+        self.drawn_chunks = {}  # chunk_coords -> (chunk, version) currently in the buffer
+        self.strips_drawn = 0  # Regions redrawn since the last full redraw, for profiling
+
+    def invalidate(self):
+        """Force a full redraw on the next frame."""
+        self.origin = None
+
+    def _aligned_origin(self, camera_offset):
+        return (
+            math.floor(camera_offset.x / tile_size[0]) * tile_size[0] - self.margin[0],
+            math.floor(camera_offset.y / tile_size[1]) * tile_size[1] - self.margin[1],
+        )
+
+    def draw(self, screen, camera_offset, visible_chunks):
+        """Bring the back-buffer up to date and blit it to the screen."""
+        buffer_size = (screen.get_width() + 2 * self.margin[0], screen.get_height() + 2 * self.margin[1])
+        if self.buffer is None or self.buffer.get_size() != buffer_size:
+            self.buffer = pygame.Surface(buffer_size)
+            if pygame.display.get_surface() is not None:
+                self.buffer = self.buffer.convert()
+            self.origin = None
+
+        visible = {chunk.chunk_coords: chunk for chunk in visible_chunks}
+        origin = self._aligned_origin(camera_offset)
+
+        if self.origin is None:
+            self.origin = origin
+            self.drawn_chunks = {}
+            self._draw_region(pygame.Rect(origin, buffer_size), visible)
+        else:
+            # Chunks that appeared, disappeared or were edited since they were drawn. Collected
+            # before scrolling, since the exposed strips may already cover part of a new chunk.
+            stale = [chunk for key, (chunk, version) in self.drawn_chunks.items() if visible.get(key) is not chunk or chunk.version != version]
+            stale += [chunk for key, chunk in visible.items() if key not in self.drawn_chunks]
+            for chunk in stale:
+                self.drawn_chunks.pop(chunk.chunk_coords, None)
+
+            if origin != self.origin:
+                self._scroll(origin, visible)
+            for chunk in stale:
+                self._draw_region(self._chunk_rect(chunk), visible)
+
+        # Floor rather than letting blit truncate, so sub-pixel camera offsets shift the whole layer uniformly
+        screen.blit(self.buffer, (math.floor(self.origin[0] - camera_offset.x), math.floor(self.origin[1] - camera_offset.y)))
+
+    def _scroll(self, origin, visible):
+        """Shift the buffer contents and draw only the exposed strips."""
+        dx, dy = origin[0] - self.origin[0], origin[1] - self.origin[1]
+        width, height = self.buffer.get_size()
+        self.origin = origin
+        if abs(dx) >= width or abs(dy) >= height:
+            self.drawn_chunks = {}
+            self._draw_region(pygame.Rect(origin, (width, height)), visible)
+            return
+
+        self.buffer.scroll(-dx, -dy)
+        if dx > 0:
+            self._draw_region(pygame.Rect(origin[0] + width - dx, origin[1], dx, height), visible)
+        elif dx < 0:
+            self._draw_region(pygame.Rect(origin[0], origin[1], -dx, height), visible)
+        if dy > 0:
+            self._draw_region(pygame.Rect(origin[0], origin[1] + height - dy, width, dy), visible)
+        elif dy < 0:
+            self._draw_region(pygame.Rect(origin[0], origin[1], width, -dy), visible)
+
+    def _chunk_rect(self, chunk):
+        return pygame.Rect(chunk.chunk_position, (chunk.chunk_size[0] * chunk.tile_size[0], chunk.chunk_size[1] * chunk.tile_size[1]))
+
+    def _draw_region(self, region, visible):
+        """Redraw a world-space region of the buffer from the baked chunk surfaces."""
+        region = region.clip(pygame.Rect(self.origin, self.buffer.get_size()))
+        if region.width <= 0 or region.height <= 0:
+            return
+        self.strips_drawn += 1
+
+        # Anything not covered by a visible chunk is background
+        self.buffer.fill("black", region.move(-self.origin[0], -self.origin[1]))
+        for key, chunk in visible.items():
+            chunk_rect = self._chunk_rect(chunk)
+            area = region.clip(chunk_rect)
+            if area.width <= 0 or area.height <= 0:
+                continue
+            self.buffer.blit(
+                surface_cache.get(chunk),
+                (area.x - self.origin[0], area.y - self.origin[1]),
+                area.move(-chunk_rect.x, -chunk_rect.y),
+            )
+            self.drawn_chunks[key] = (chunk, chunk.version)
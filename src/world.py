@@ -1,146 +1,574 @@
-import pygame
-import os
-import json
-from agents import AGENT
-from typing import List
-
-render_distance = 1  # Number of chunks to render around the player
-chunk_size = (10, 10)  # Each chunk is 10x10 tiles
-tile_size = (50, 50)  # Each tile is 50x50 pixels
-
-root = os.path.dirname(os.path.abspath(__file__))
-def world_generation(game_state):
-    with open(os.path.join(root, "data", "world.json"), "r") as file:
-        world_chunks_json_data = json.load(file)
-
-    with open(os.path.join(root, "data", "agents.json"), "r") as file:
-        agents_json_data = json.load(file)
-
-    chunks = []
-    for chunk_data in world_chunks_json_data:
-        chunk_position = (
-            chunk_data["position"][0] * 500,  # Convert chunk coordinates to world coordinates
-            chunk_data["position"][1] * 500,
-        )
-        chunk_roomIdentifier = chunk_data["roomIdentifier"] if "roomIdentifier" in chunk_data else ""
-        tile_map = chunk_data["tile"]
-
-        # Filter agents for this chunk
-        agetns_data = [
-            agent for agent in agents_json_data
-            if agent["chunk_position"] == chunk_data["position"]  # Match chunk position
-        ]
-
-        chunks.append(Chunk(chunk_position, chunk_size, chunk_roomIdentifier, tile_size, tile_map, agetns_data, game_state))
-    return chunks
-
-def get_visible_chunks(player_position, chunks):
-    """Return chunks within a 5-chunk radius of the player's position."""
-    visible_chunks = []
-    player_chunk_x = player_position[0] // (chunk_size[0] * tile_size[0])
-    player_chunk_y = player_position[1] // (chunk_size[1] * tile_size[1])
-
-    for chunk in chunks:
-        chunk_x = chunk.chunk_position[0] // (chunk_size[0] * tile_size[0])
-        chunk_y = chunk.chunk_position[1] // (chunk_size[1] * tile_size[1])
-
-        if abs(chunk_x - player_chunk_x) <= render_distance and abs(chunk_y - player_chunk_y) <= render_distance:
-            visible_chunks.append(chunk)
-
-    return visible_chunks
-
-class Chunk:
-    def __init__(self, chunk_position, chunk_size, chunk_roomIdentifier, tile_size, tile_map, agents_data, game_state):
-        self.chunk_position = chunk_position  # (x, y) position of the chunk in world space
-        self.chunk_size = chunk_size  # (width, height) in tiles
-        self.chunk_roomIdentifier = chunk_roomIdentifier  # (width, height) of each tile
-        self.tile_size = tile_size  # (width, height) of each tile
-        self.tiles = []  # List to store tiles in this chunk
-        self.agents = []  # List to store NPCs in this chunk
-
-        # Generate tiles based on the tile_map
-        for row_index, row in enumerate(tile_map):
-            for col_index, tile_type in enumerate(row):
-                tile_position = (
-                    chunk_position[0] + col_index * tile_size[0],
-                    chunk_position[1] + row_index * tile_size[1],
-                )
-                if tile_type == 0:  # Floor
-                    self.tiles.append(Tile(tile_position, tile_size, "floor", walkable=True))
-                elif tile_type == 1:  # Wall
-                    self.tiles.append(Tile(tile_position, tile_size, "wall", walkable=False))
-                elif tile_type == 2:  # Hole
-                    self.tiles.append(Tile(tile_position, tile_size, "furniture", walkable=False))
-
-        # Load NPCs from the JSON data
-        for agent in agents_data:
-            agent_tile_position = (
-                chunk_position[0] + agent["tile"][0] * tile_size[0],
-                chunk_position[1] + agent["tile"][1] * tile_size[1],
-            )
-            agent_position = (
-                agent_tile_position[0] + agent["tile_offset"][0],
-                agent_tile_position[1] + agent["tile_offset"][1],
-            )
-            detection = agent["detection"]
-            name = agent.get("name", "Unknown")
-            profession = agent.get("profession", "none")
-            dialogue = agent.get("dialogue", False)
-
-            self.agents.append(AGENT(agent_position, detection, name, profession, dialogue, game_state))
-
-    def draw(self, screen, camera_offset):
-        """Draw all tiles and NPCs in this chunk."""
-        # Draw tiles
-        for tile in self.tiles:
-            if tile.tile_type == "floor":
-                tile.draw(screen, camera_offset, "gray")
-            elif tile.tile_type == "wall":
-                tile.draw(screen, camera_offset, "black")
-            elif tile.tile_type == "furniture":
-                tile.draw(screen, camera_offset, "antiquewhite4")
-
-        # Draw NPCs
-        for agent in self.agents:
-            agent.draw(screen, camera_offset)
-
-    def draw_debug_info(self, screen, camera_offset, font):
-        """Draw debug information and grid lines for the chunk."""
-        chunk_screen_pos = (
-            self.chunk_position[0] - camera_offset.x,
-            self.chunk_position[1] - camera_offset.y,
-        )
-
-        # Draw chunk coordinates
-        text_surface = font.render(f"X: {self.chunk_position[0] // 500}, Y: {self.chunk_position[1] // 500}", True, (255, 255, 255))
-        screen.blit(text_surface, (chunk_screen_pos[0] + 10, chunk_screen_pos[1] + 10))
-
-        text_surface = font.render(f"{self.chunk_roomIdentifier}", True, (255, 255, 255))
-        screen.blit(text_surface, (chunk_screen_pos[0] + 10, chunk_screen_pos[1] + 35))
-
-        # Draw grid lines around the chunk
-        chunk_width = self.chunk_size[0] * self.tile_size[0]
-        chunk_height = self.chunk_size[1] * self.tile_size[1]
-        pygame.draw.rect(
-            screen,
-            (255, 255, 255),  # White color for the grid lines
-            (
-                chunk_screen_pos[0],
-                chunk_screen_pos[1],
-                chunk_width,
-                chunk_height,
-            ),
-            1,  # Line thickness
-        )
-
-class Tile:
-    def __init__(self, position, size, tile_type="floor", walkable=True):
-        self.position = position  # (x, y) position of the tile
-        self.size = size  # Size of the tile (width, height)
-        self.tile_type = tile_type  # "floor", "hole", "wall"
-        self.walkable = walkable  # Whether the tile is walkable
-
-    def draw(self, screen, camera_offset, color):
-        """Draw the tile on the screen."""
-        screen_pos = (self.position[0] - camera_offset.x, self.position[1] - camera_offset.y)
-        pygame.draw.rect(screen, color, (screen_pos[0], screen_pos[1], self.size[0], self.size[1]))
\ No newline at end of file
+import pygame
+import os
+from array import array
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from agents import AGENT, AgentIndex
+from agent_system import agent_system
+from fonts import render_text
+from world_store import load_world_store
+from worldgen import ChunkGenerator, LayeredChunkSource
+from pathfinding import PathfindingService
+from typing import List
+
+render_distance = 1  # Number of chunks to render around the player
+chunk_size = (10, 10)  # Each chunk is 10x10 tiles
+tile_size = (50, 50)  # Each tile is 50x50 pixels
+surface_cache_bytes = 64 * 1024 * 1024  # Memory budget for baked chunk surfaces
+
+root = os.path.dirname(os.path.abspath(__file__))
+def world_generation(game_state, seed=None, saved_chunks=None):
+    """Open the compiled world; chunks are streamed in as the player approaches them.
+
+    With a seed, chunks missing from the hand-authored world are generated procedurally.
+    Chunks from a save file (see savegame.SaveSlot.chunk_source) take priority over both.
+    """
+    sources = [load_world_store()]
+    if seed is not None:
+        sources.append(ChunkGenerator(seed, chunk_size))
+    if saved_chunks is not None:
+        sources.insert(0, saved_chunks)
+    source = LayeredChunkSource(*sources) if len(sources) > 1 else sources[0]
+    return World(source=source, game_state=game_state)
+
+def build_chunk(chunk_x, chunk_y, tile_map, chunk_roomIdentifier, agents_data, game_state):
+    """Create a Chunk from chunk coordinates and its decoded data."""
+    chunk_position = (
+        chunk_x * chunk_size[0] * tile_size[0],  # Convert chunk coordinates to world coordinates
+        chunk_y * chunk_size[1] * tile_size[1],
+    )
+    return Chunk(chunk_position, chunk_size, chunk_roomIdentifier, tile_size, tile_map, agents_data, game_state)
+
+def get_visible_chunks(player_position, world):
+    """Return chunks within render_distance of the player's position."""
+    return world.get_visible_chunks(player_position)
+
+class World:
+    """Chunk container keyed by (chunk_x, chunk_y) so lookups don't depend on world size.
+
+    With a source (see world_store.ChunkStore) only the chunks around the player are kept
+    in memory: the visible ring is materialized on demand, the next ring is prefetched on a
+    background thread and chunks further out are dropped again.
+    """
+    def __init__(self, chunks=(), source=None, game_state=None):
+        self.chunk_pixel_size = (chunk_size[0] * tile_size[0], chunk_size[1] * tile_size[1])
+        self.chunks = {}  # (chunk_x, chunk_y) -> Chunk, everything currently in memory
+        self.source = source
+        self.game_state = game_state
+        self.dirty_chunks = set()  # Edited chunks are never dropped from memory
+
+        for chunk in chunks:
+            self.chunks[self.chunk_coords(chunk.chunk_position)] = chunk
+
+        self.collision_map = CollisionMap(chunks)
+        self.agent_index = AgentIndex()
+        for chunk in chunks:
+            for agent in chunk.agents:
+                self.agent_index.add(agent)
+
+        # Neighbour set is only rebuilt when the player crosses a chunk boundary
+        self._visible_key = None
+        self._visible_chunks = []
+
+        self.pathfinder = PathfindingService(self, chunk_size, tile_size)  # NPC routes over this world
+        self.fov = None  # fov.FieldOfView when fog of war is on
+
+        self._prefetcher = ThreadPoolExecutor(max_workers=1) if source is not None else None
+        self._prefetched = {}  # (chunk_x, chunk_y) -> Future of decoded chunk data
+
+    def __iter__(self):
+        return iter(self.chunks.values())
+
+    def close(self):
+        """Stop the prefetch thread and release the chunk source."""
+        if self._prefetcher is not None:
+            self._prefetcher.shutdown(cancel_futures=True)
+            self._prefetched.clear()
+        if self.source is not None and hasattr(self.source, "close"):
+            self.source.close()
+        for chunk in self.chunks.values():
+            for agent in chunk.agents:
+                agent.release()
+        self.chunks.clear()
+
+    def __len__(self):
+        return len(self.chunks)
+
+    def chunk_coords(self, world_point):
+        """Convert a world-space point to chunk coordinates."""
+        return (
+            int(world_point[0] // self.chunk_pixel_size[0]),
+            int(world_point[1] // self.chunk_pixel_size[1]),
+        )
+
+    def get_chunk(self, chunk_x, chunk_y):
+        """Return the chunk at chunk coordinates, loading it from the source if needed, or None."""
+        chunk = self.chunks.get((chunk_x, chunk_y))
+        if chunk is None and self.source is not None:
+            chunk = self._materialize(chunk_x, chunk_y)
+        return chunk
+
+    def walkable_mask(self, chunk_x, chunk_y):
+        """Walkability of a chunk's tiles (see Chunk.walkable_mask), or None if there is no chunk.
+
+        Chunks that aren't in memory are read straight from the source without being built,
+        so route planning far from the player doesn't pull them into the world.
+        """
+        chunk = self.chunks.get((chunk_x, chunk_y))
+        if chunk is not None:
+            return chunk.walkable_mask()
+        if self.source is None:
+            return None
+        data = self.source.load(chunk_x, chunk_y)
+        if data is None:
+            return None
+        return bytes(data[0]).translate(walkable_table)
+
+    def chunk_at(self, world_point):
+        """Return the chunk containing a world-space point, or None."""
+        return self.get_chunk(*self.chunk_coords(world_point))
+
+    def _materialize(self, chunk_x, chunk_y):
+        """Build a chunk from prefetched data (or a synchronous load) and index it."""
+        future = self._prefetched.pop((chunk_x, chunk_y), None)
+        data = future.result() if future is not None else self.source.load(chunk_x, chunk_y)
+        if data is None:
+            return None
+
+        tile_map, chunk_roomIdentifier, agents_data = data
+        chunk = build_chunk(chunk_x, chunk_y, tile_map, chunk_roomIdentifier, agents_data, self.game_state)
+        self.chunks[(chunk_x, chunk_y)] = chunk
+        self.collision_map.add_chunk(chunk)
+        return chunk
+
+    def _prefetch_ring(self, center, distance):
+        """Start decoding the chunks on the ring at `distance` in the background."""
+        center_x, center_y = center
+        for chunk_y in range(center_y - distance, center_y + distance + 1):
+            for chunk_x in range(center_x - distance, center_x + distance + 1):
+                if max(abs(chunk_x - center_x), abs(chunk_y - center_y)) != distance:
+                    continue
+                key = (chunk_x, chunk_y)
+                if key in self.chunks or key in self._prefetched or not self.source.has(chunk_x, chunk_y):
+                    continue
+                self._prefetched[key] = self._prefetcher.submit(self.source.load, chunk_x, chunk_y)
+
+    def _unload_far(self, centers, keep_distance):
+        """Drop chunks (and pending prefetches) further than keep_distance from every center."""
+        def is_far(key):
+            return all(max(abs(key[0] - center[0]), abs(key[1] - center[1])) > keep_distance for center in centers)
+
+        for key in [key for key in self.chunks if is_far(key) and key not in self.dirty_chunks]:
+            for agent in self.chunks.pop(key).agents:
+                self.agent_index.remove(agent)
+                agent.release()
+            self.collision_map.remove_chunk(key)
+        for key in [key for key in self._prefetched if is_far(key)]:
+            self._prefetched.pop(key).cancel()
+
+    def tile_at(self, world_point):
+        """Return the tile containing a world-space point, or None."""
+        chunk = self.chunk_at(world_point)
+        if chunk is None:
+            return None
+        col = int(world_point[0] - chunk.chunk_position[0]) // chunk.tile_size[0]
+        row = int(world_point[1] - chunk.chunk_position[1]) // chunk.tile_size[1]
+        return chunk.tile_at(col, row)
+
+    def get_visible_chunks(self, player_position):
+        """Return chunks within render_distance of the player's position."""
+        key = (self.chunk_coords(player_position), render_distance)
+        if key != self._visible_key:
+            center, distance = key
+            self._visible_key = key
+            self._visible_chunks = self.chunks_around(center, distance)
+            self.stream_around([center], distance)
+
+            # Baked surfaces two or more rings outside the view are no longer worth keeping
+            surface_cache.evict_far(center, distance + 1)
+        return self._visible_chunks
+
+    def refresh_visible(self):
+        """Rebuild the visible set on the next query, e.g. after chunks arrived from a server."""
+        self._visible_key = None
+
+    def chunks_around(self, center, distance):
+        """Return the chunks within distance of a chunk, loading them and spawning their NPCs."""
+        center_x, center_y = center
+        chunks = []
+        for chunk_y in range(center_y - distance, center_y + distance + 1):
+            for chunk_x in range(center_x - distance, center_x + distance + 1):
+                chunk = self.get_chunk(chunk_x, chunk_y)
+                if chunk is not None:
+                    # Chunks loaded for collision or tile queries get their NPCs once seen
+                    for agent in chunk.spawn_agents():
+                        self.agent_index.add(agent)
+                    chunks.append(chunk)
+        return chunks
+
+    def stream_around(self, centers, distance):
+        """Drop chunks far from every center and prefetch the ring just outside each one."""
+        if self.source is None:
+            return
+        self._unload_far(centers, distance + 2)
+        for center in centers:
+            self._prefetch_ring(center, distance + 1)
+
+    def update_agents(self, dt, player_pos=None):
+        """Advance every loaded NPC in one batch and re-index the ones that changed cell."""
+        for slot in agent_system.update(dt, player_pos):
+            self.agent_index.refresh(agent_system.views[slot])
+
+    def move_agent(self, agent, position):
+        """Move an agent and keep the spatial index up to date."""
+        self.agent_index.move(agent, position)
+
+    def set_tile(self, world_point, tile_type):
+        """Change the tile at a world-space point and refresh everything derived from it."""
+        chunk = self.chunk_at(world_point)
+        if chunk is None:
+            return False
+        col = int(world_point[0] - chunk.chunk_position[0]) // chunk.tile_size[0]
+        row = int(world_point[1] - chunk.chunk_position[1]) // chunk.tile_size[1]
+        chunk.set_tile(col, row, tile_type)
+        self.collision_map.add_chunk(chunk)
+        self.pathfinder.invalidate_chunk(*chunk.chunk_coords)
+        if self.fov is not None:
+            self.fov.invalidate_chunk(*chunk.chunk_coords)
+        self.dirty_chunks.add(chunk.chunk_coords)
+        return True
+
+class ChunkSurfaceCache:
+    """LRU cache of pre-rendered chunk tile layers, bounded by total surface memory."""
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self.used_bytes = 0
+        self.surfaces = OrderedDict()  # (chunk_x, chunk_y) -> Surface
+
+    def get(self, chunk):
+        """Return the baked surface for a chunk, baking it on a miss."""
+        key = chunk.chunk_coords
+        surface = self.surfaces.get(key)
+        if surface is not None:
+            self.surfaces.move_to_end(key)
+            return surface
+
+        surface = chunk.bake()
+        self.surfaces[key] = surface
+        self.used_bytes += self._surface_bytes(surface)
+
+        # Evict least recently drawn chunks until we are back under budget (always keep the new one)
+        while self.used_bytes > self.max_bytes and len(self.surfaces) > 1:
+            _, evicted = self.surfaces.popitem(last=False)
+            self.used_bytes -= self._surface_bytes(evicted)
+        return surface
+
+    def invalidate(self, chunk_coords):
+        """Drop the baked surface for a chunk so it is re-baked on the next draw."""
+        surface = self.surfaces.pop(chunk_coords, None)
+        if surface is not None:
+            self.used_bytes -= self._surface_bytes(surface)
+
+    def evict_far(self, center, keep_distance):
+        """Drop baked surfaces further than keep_distance chunks from center."""
+        for key in [key for key in self.surfaces
+                    if max(abs(key[0] - center[0]), abs(key[1] - center[1])) > keep_distance]:
+            self.invalidate(key)
+
+    def clear(self):
+        self.surfaces.clear()
+        self.used_bytes = 0
+
+    @staticmethod
+    def _surface_bytes(surface):
+        return surface.get_width() * surface.get_height() * surface.get_bytesize()
+
+surface_cache = ChunkSurfaceCache(surface_cache_bytes)
+
+class CollisionMap:
+    """Per-chunk walkability bitmaps keyed by chunk coordinate, built once at load time."""
+    def __init__(self, chunks):
+        self.chunk_size = chunk_size
+        self.tile_size = tile_size
+        self.blocked = {}  # (chunk_x, chunk_y) -> bytes, 1 = blocked tile
+
+        for chunk in chunks:
+            self.add_chunk(chunk)
+
+    def add_chunk(self, chunk):
+        """Build (or rebuild) the bitmap for a single chunk."""
+        chunk_x = chunk.chunk_position[0] // (self.chunk_size[0] * self.tile_size[0])
+        chunk_y = chunk.chunk_position[1] // (self.chunk_size[1] * self.tile_size[1])
+        self.blocked[(chunk_x, chunk_y)] = chunk.blocked_mask()
+
+    def remove_chunk(self, chunk_coords):
+        """Forget the bitmap of a chunk that was unloaded."""
+        self.blocked.pop(chunk_coords, None)
+
+    def is_blocked(self, tile_x, tile_y):
+        """Return True if the tile at global tile coordinates blocks movement."""
+        chunk_x, col = divmod(tile_x, self.chunk_size[0])
+        chunk_y, row = divmod(tile_y, self.chunk_size[1])
+        bitmap = self.blocked.get((chunk_x, chunk_y))
+        if bitmap is None:
+            return False  # Outside the world there are no tiles to collide with
+        return bitmap[row * self.chunk_size[0] + col] == 1
+
+    def rect_blocked(self, rect):
+        """Return True if the rect overlaps any blocked tile (only the tiles it touches are tested)."""
+        first_x = rect.left // self.tile_size[0]
+        last_x = (rect.right - 1) // self.tile_size[0]
+        first_y = rect.top // self.tile_size[1]
+        last_y = (rect.bottom - 1) // self.tile_size[1]
+
+        for tile_y in range(first_y, last_y + 1):
+            for tile_x in range(first_x, last_x + 1):
+                if self.is_blocked(tile_x, tile_y):
+                    return True
+        return False
+
+class Chunk:
+    __slots__ = ("chunk_position", "chunk_coords", "chunk_size", "chunk_roomIdentifier", "tile_size", "tile_ids", "agents", "agents_data", "game_state", "version")
+
+    def __init__(self, chunk_position, chunk_size, chunk_roomIdentifier, tile_size, tile_map, agents_data, game_state):
+        self.chunk_position = chunk_position  # (x, y) position of the chunk in world space
+        self.chunk_coords = (
+            chunk_position[0] // (chunk_size[0] * tile_size[0]),
+            chunk_position[1] // (chunk_size[1] * tile_size[1]),
+        )
+        self.chunk_size = chunk_size  # (width, height) in tiles
+        self.chunk_roomIdentifier = chunk_roomIdentifier  # (width, height) of each tile
+        self.tile_size = tile_size  # (width, height) of each tile
+        self.version = 0  # Bumped on every tile edit so cached renderings can tell they are stale
+
+        # Tile type ids stored row by row, one byte per tile
+        if isinstance(tile_map, (bytes, bytearray, memoryview)):
+            # Already packed (compiled world), only unknown ids need mapping to empty
+            self.tile_ids = array("B", bytes(tile_map).translate(valid_table))
+            tile_map = []
+        else:
+            self.tile_ids = array("B", bytes([EMPTY_TILE]) * (chunk_size[0] * chunk_size[1]))
+        for row_index, row in enumerate(tile_map[:chunk_size[1]]):
+            for col_index, tile_type in enumerate(row[:chunk_size[0]]):
+                if tile_type in tile_types:
+                    self.tile_ids[row_index * chunk_size[0] + col_index] = tile_type
+
+        # NPCs are only created once the chunk comes into view (see spawn_agents)
+        self.agents = []  # List to store NPCs in this chunk
+        self.agents_data = agents_data
+        self.game_state = game_state
+
+    def spawn_agents(self):
+        """Create the NPCs from the chunk data on first use; returns the newly created agents."""
+        if self.agents_data is None:
+            return []
+        for agent in self.agents_data:
+            agent_tile_position = (
+                self.chunk_position[0] + agent["tile"][0] * self.tile_size[0],
+                self.chunk_position[1] + agent["tile"][1] * self.tile_size[1],
+            )
+            agent_position = (
+                agent_tile_position[0] + agent["tile_offset"][0],
+                agent_tile_position[1] + agent["tile_offset"][1],
+            )
+            detection = agent["detection"]
+            name = agent.get("name", "Unknown")
+            profession = agent.get("profession", "none")
+            dialogue = agent.get("dialogue", False)
+
+            self.agents.append(AGENT(agent_position, detection, name, profession, dialogue, self.game_state))
+        self.agents_data = None
+        return self.agents
+
+    def agents_json(self):
+        """NPC data in the agents.json layout at their current positions (for saving)."""
+        if self.agents_data is not None:
+            return list(self.agents_data)
+        data = []
+        for agent in self.agents:
+            position = agent.position
+            x, y = position.x - self.chunk_position[0], position.y - self.chunk_position[1]
+            col, row = int(x // self.tile_size[0]), int(y // self.tile_size[1])
+            data.append({
+                "name": agent.name,
+                "profession": agent.profession,
+                "chunk_position": list(self.chunk_coords),
+                "tile": [col, row],
+                "tile_offset": [x - col * self.tile_size[0], y - row * self.tile_size[1]],
+                "dialogue": agent.dialogue,
+                "detection": agent.detection,
+            })
+        return data
+
+    @property
+    def tiles(self):
+        """Tile views for every non-empty cell, in row order."""
+        return [Tile(self, index) for index, tile_id in enumerate(self.tile_ids) if tile_id != EMPTY_TILE]
+
+    def tile_at(self, col, row):
+        """Return the tile at local (col, row), or None."""
+        if not (0 <= col < self.chunk_size[0] and 0 <= row < self.chunk_size[1]):
+            return None
+        index = row * self.chunk_size[0] + col
+        if self.tile_ids[index] == EMPTY_TILE:
+            return None
+        return Tile(self, index)
+
+    def blocked_mask(self):
+        """One byte per tile, 1 where the tile blocks movement."""
+        return self.tile_ids.tobytes().translate(blocked_table)
+
+    def walkable_mask(self):
+        """One byte per tile, 1 where the tile can be walked on (empty cells count as walkable)."""
+        return self.tile_ids.tobytes().translate(walkable_table)
+
+    def opaque_mask(self):
+        """One byte per tile, 1 where the tile blocks line of sight."""
+        return self.tile_ids.tobytes().translate(opaque_table)
+
+    def set_tile(self, col, row, tile_type):
+        """Replace the tile at local (col, row) and invalidate the baked surface."""
+        tile_id = tile_type_ids[tile_type] if isinstance(tile_type, str) else tile_type
+        if tile_id not in tile_types or not (0 <= col < self.chunk_size[0] and 0 <= row < self.chunk_size[1]):
+            return
+        self.tile_ids[row * self.chunk_size[0] + col] = tile_id
+        self.version += 1
+        surface_cache.invalidate(self.chunk_coords)
+
+    def bake(self):
+        """Render the static tile layer of this chunk into an off-screen surface."""
+        surface = pygame.Surface((self.chunk_size[0] * self.tile_size[0], self.chunk_size[1] * self.tile_size[1]))
+        if pygame.display.get_surface() is not None:
+            surface = surface.convert()
+        surface.fill("black")  # Missing tiles are left black, same as the screen background
+
+        # Draw each horizontal run of identical tiles as one rect
+        width = self.chunk_size[0]
+        tile_w, tile_h = self.tile_size
+        for row in range(self.chunk_size[1]):
+            row_ids = self.tile_ids[row * width:(row + 1) * width]
+            col = 0
+            while col < width:
+                tile_id = row_ids[col]
+                run_end = col + 1
+                while run_end < width and row_ids[run_end] == tile_id:
+                    run_end += 1
+                if tile_id != EMPTY_TILE:
+                    surface.fill(tile_types[tile_id].color, (col * tile_w, row * tile_h, (run_end - col) * tile_w, tile_h))
+                col = run_end
+        return surface
+
+    def draw_tiles(self, screen, camera_offset):
+        """Draw the baked tile layer in a single blit."""
+        screen.blit(surface_cache.get(self), (self.chunk_position[0] - camera_offset.x, self.chunk_position[1] - camera_offset.y))
+
+    def draw(self, screen, camera_offset):
+        """Draw all tiles and NPCs in this chunk."""
+        self.draw_tiles(screen, camera_offset)
+
+        # Draw NPCs
+        for agent in self.agents:
+            agent.draw(screen, camera_offset)
+
+    def draw_debug_info(self, screen, camera_offset, font):
+        """Draw debug information and grid lines for the chunk."""
+        chunk_screen_pos = (
+            self.chunk_position[0] - camera_offset.x,
+            self.chunk_position[1] - camera_offset.y,
+        )
+
+        # Draw chunk coordinates
+        text_surface = render_text(font, f"X: {self.chunk_position[0] // 500}, Y: {self.chunk_position[1] // 500}", (255, 255, 255))
+        screen.blit(text_surface, (chunk_screen_pos[0] + 10, chunk_screen_pos[1] + 10))
+
+        text_surface = render_text(font, f"{self.chunk_roomIdentifier}", (255, 255, 255))
+        screen.blit(text_surface, (chunk_screen_pos[0] + 10, chunk_screen_pos[1] + 35))
+
+        # Draw grid lines around the chunk
+        chunk_width = self.chunk_size[0] * self.tile_size[0]
+        chunk_height = self.chunk_size[1] * self.tile_size[1]
+        pygame.draw.rect(
+            screen,
+            (255, 255, 255),  # White color for the grid lines
+            (
+                chunk_screen_pos[0],
+                chunk_screen_pos[1],
+                chunk_width,
+                chunk_height,
+            ),
+            1,  # Line thickness
+        )
+
+class TileType:
+    __slots__ = ("id", "name", "walkable", "color", "opaque")
+
+    def __init__(self, tile_id, name, walkable, color, opaque=False):
+        self.id = tile_id
+        self.name = name
+        self.walkable = walkable
+        self.color = pygame.Color(color)
+        self.opaque = opaque  # Blocks line of sight
+
+EMPTY_TILE = 255  # Cells with an unknown id in the map: not drawn, don't collide
+
+tile_types = {}  # id -> TileType
+tile_type_ids = {}  # name -> id
+walkable_table = bytes(256)  # bytes.translate tables derived from the registry
+blocked_table = bytes(256)
+opaque_table = bytes(256)
+valid_table = bytes([EMPTY_TILE]) * 256
+
+def register_tile_type(tile_id, name, walkable, color, opaque=False):
+    """Add a tile type to the registry and rebuild the walkability lookup tables."""
+    global walkable_table, blocked_table, opaque_table, valid_table
+    tile_types[tile_id] = TileType(tile_id, name, walkable, color, opaque)
+    tile_type_ids[name] = tile_id
+
+    walkable_table = bytes(0 if i in tile_types and not tile_types[i].walkable else 1 for i in range(256))
+    blocked_table = bytes(1 - flag for flag in walkable_table)
+    opaque_table = bytes(1 if i in tile_types and tile_types[i].opaque else 0 for i in range(256))
+    valid_table = bytes(i if i in tile_types else EMPTY_TILE for i in range(256))
+
+register_tile_type(0, "floor", True, "gray")
+register_tile_type(1, "wall", False, "black", opaque=True)
+register_tile_type(2, "furniture", False, "antiquewhite4")  # "Hole" in the map data
+
+class Tile:
+    """Lightweight view of one cell of a chunk's tile array."""
+    __slots__ = ("chunk", "index")
+
+    def __init__(self, chunk, index):
+        self.chunk = chunk
+        self.index = index
+
+    @property
+    def position(self):
+        """(x, y) position of the tile in world space."""
+        row, col = divmod(self.index, self.chunk.chunk_size[0])
+        return (
+            self.chunk.chunk_position[0] + col * self.chunk.tile_size[0],
+            self.chunk.chunk_position[1] + row * self.chunk.tile_size[1],
+        )
+
+    @property
+    def size(self):
+        return self.chunk.tile_size
+
+    @property
+    def tile_id(self):
+        return self.chunk.tile_ids[self.index]
+
+    @property
+    def tile_type(self):
+        return tile_types[self.tile_id].name  # "floor", "wall", "furniture"
+
+    @property
+    def walkable(self):
+        return tile_types[self.tile_id].walkable
+
+    def draw(self, screen, camera_offset, color=None):
+        """Draw the tile on the screen."""
+        if color is None:
+            color = tile_types[self.tile_id].color
+        screen_pos = (self.position[0] - camera_offset.x, self.position[1] - camera_offset.y)
+        pygame.draw.rect(screen, color, (screen_pos[0], screen_pos[1], self.size[0], self.size[1]))
@@ -0,0 +1,176 @@
+import os
+import json
+import mmap
+import struct
+
+# Compiled world file layout (little endian):
+#   header:  magic, version, chunk width, chunk height, chunk count, index offset
+#   records: tile ids (width * height bytes), room identifier, agents (compact JSON)
+#   index:   (chunk_x, chunk_y, record offset, record length) sorted by (chunk_x, chunk_y)
+MAGIC = b"WRLD"
+VERSION = 1
+HEADER = struct.Struct("<4sHHHIQ")
+INDEX_ENTRY = struct.Struct("<iiQI")
+ROOM_HEADER = struct.Struct("<H")
+AGENTS_HEADER = struct.Struct("<I")
+
+root = os.path.dirname(os.path.realpath(__file__))
+world_json_path = os.path.join(root, "data", "world.json")
+agents_json_path = os.path.join(root, "data", "agents.json")
+compiled_world_path = os.path.join(root, "data", "world.bin")
+
+def compile_world(world_path, agents_path, out_path, chunk_size=(10, 10)):
+    """Compile the JSON world and agent data into an indexed binary chunk file."""
+    with open(world_path, "r") as file:
+        world_chunks_json_data = json.load(file)
+
+    with open(agents_path, "r") as file:
+        agents_json_data = json.load(file)
+
+    return write_world(world_chunks_json_data, agents_json_data, out_path, chunk_size)
+
+def write_world(world_chunks_json_data, agents_json_data, out_path, chunk_size=(10, 10)):
+    """Write chunk and agent data (in the JSON layout) to an indexed binary chunk file."""
+    # Group agents by chunk once instead of filtering the whole list per chunk
+    agents_by_chunk = {}
+    for agent in agents_json_data:
+        agents_by_chunk.setdefault(tuple(agent["chunk_position"]), []).append(agent)
+
+    records = (
+        (tuple(chunk_data["position"]), encode_chunk(
+            chunk_data["tile"],
+            chunk_data.get("roomIdentifier", ""),
+            agents_by_chunk.get(tuple(chunk_data["position"]), []),
+            chunk_size,
+        ))
+        for chunk_data in world_chunks_json_data
+    )
+    return write_chunks(records, out_path, chunk_size)
+
+def write_chunks(records, out_path, chunk_size=(10, 10)):
+    """Write ((chunk_x, chunk_y), encoded record) pairs to an indexed chunk file, replacing it atomically."""
+    index = []
+    tmp_path = out_path + ".tmp"
+    with open(tmp_path, "wb") as file:
+        file.write(bytes(HEADER.size))  # Filled in once the index offset is known
+
+        for position, record in records:
+            index.append((position[0], position[1], file.tell(), len(record)))
+            file.write(record)
+
+        index.sort()
+        index_offset = file.tell()
+        for entry in index:
+            file.write(INDEX_ENTRY.pack(*entry))
+
+        file.seek(0)
+        file.write(HEADER.pack(MAGIC, VERSION, chunk_size[0], chunk_size[1], len(index), index_offset))
+
+    os.replace(tmp_path, out_path)
+    return len(index)
+
+def encode_chunk(tile_map, room_identifier, agents_data, chunk_size):
+    """Encode one chunk record; tile_map is rows of tile ids or already packed bytes."""
+    if isinstance(tile_map, (bytes, bytearray, memoryview)):
+        tiles = bytearray(tile_map)
+        tile_map = []
+    else:
+        tiles = bytearray(b"\xff" * (chunk_size[0] * chunk_size[1]))  # 255 = empty cell
+    for row_index, row in enumerate(tile_map[:chunk_size[1]]):
+        for col_index, tile_type in enumerate(row[:chunk_size[0]]):
+            if 0 <= tile_type < 255:
+                tiles[row_index * chunk_size[0] + col_index] = tile_type
+
+    room = room_identifier.encode("utf-8")
+    agents = json.dumps(agents_data, separators=(",", ":")).encode("utf-8") if agents_data else b""
+    return bytes(tiles) + ROOM_HEADER.pack(len(room)) + room + AGENTS_HEADER.pack(len(agents)) + agents
+
+def decode_chunk(buffer, offset, chunk_size):
+    """Decode the chunk record at offset into (tiles, room identifier, agents data)."""
+    tile_count = chunk_size[0] * chunk_size[1]
+    tiles = buffer[offset:offset + tile_count]
+    offset += tile_count
+
+    (room_length,) = ROOM_HEADER.unpack_from(buffer, offset)
+    offset += ROOM_HEADER.size
+    room_identifier = bytes(buffer[offset:offset + room_length]).decode("utf-8")
+    offset += room_length
+
+    (agents_length,) = AGENTS_HEADER.unpack_from(buffer, offset)
+    offset += AGENTS_HEADER.size
+    agents_data = json.loads(bytes(buffer[offset:offset + agents_length])) if agents_length else []
+
+    return tiles, room_identifier, agents_data
+
+def needs_compile(out_path, *sources):
+    """Return True if the compiled file is missing or older than any of its sources."""
+    if not os.path.exists(out_path):
+        return True
+    compiled_time = os.path.getmtime(out_path)
+    return any(os.path.getmtime(source) > compiled_time for source in sources)
+
+def load_world_store():
+    """Open the compiled world, recompiling it first if the JSON data changed."""
+    if needs_compile(compiled_world_path, world_json_path, agents_json_path):
+        compile_world(world_json_path, agents_json_path, compiled_world_path)
+    return ChunkStore(compiled_world_path)
+
+class ChunkStore:
+    """Read-only, memory-mapped view of a compiled world file."""
+    def __init__(self, path):
+        self.path = path
+        self._file = open(path, "rb")
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, version, width, height, count, index_offset = HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{path} is not a version {VERSION} compiled world")
+        self.chunk_size = (width, height)
+        self.count = count
+        self._index_offset = index_offset
+
+    def __len__(self):
+        return self.count
+
+    def close(self):
+        self._map.close()
+        self._file.close()
+
+    def _entry(self, i):
+        return INDEX_ENTRY.unpack_from(self._map, self._index_offset + i * INDEX_ENTRY.size)
+
+    def _find(self, chunk_x, chunk_y):
+        """Binary search the on-disk index; the index itself is never loaded into memory."""
+        key = (chunk_x, chunk_y)
+        low, high = 0, self.count
+        while low < high:
+            mid = (low + high) // 2
+            entry = self._entry(mid)
+            if entry[:2] < key:
+                low = mid + 1
+            else:
+                high = mid
+        if low < self.count:
+            entry = self._entry(low)
+            if entry[:2] == key:
+                return entry
+        return None
+
+    def has(self, chunk_x, chunk_y):
+        return self._find(chunk_x, chunk_y) is not None
+
+    def coords(self):
+        """Iterate over the coordinates of every chunk in the file."""
+        for i in range(self.count):
+            yield self._entry(i)[:2]
+
+    def load(self, chunk_x, chunk_y):
+        """Decode the chunk at chunk coordinates into (tiles, room identifier, agents data), or None."""
+        entry = self._find(chunk_x, chunk_y)
+        if entry is None:
+            return None
+        return decode_chunk(self._map, entry[2], self.chunk_size)
+
+if __name__ == "__main__":
+    count = compile_world(world_json_path, agents_json_path, compiled_world_path)
+    print(f"Compiled {count} chunks to {compiled_world_path}")
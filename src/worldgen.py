@@ -0,0 +1,111 @@
+import random
+import threading
+from collections import OrderedDict
+
+# Procedural chunk generation. Generators expose the same has()/load() interface as
+# world_store.ChunkStore so they can be used as (or layered under) a World source.
+
+room_identifiers = ["market", "street", "alley", "warehouse", "square"]
+professions = [
+    # (profession, name, dialogue, weight)
+    ("shopkeeper", "Shopkeeper", "shopkeeper", 2),
+    ("beggar", "Beggar", "beggar", 1),
+    ("none", "Unknown", None, 4),
+]
+
+class ChunkGenerator:
+    """Deterministic, seeded generator: the same (seed, chunk_x, chunk_y) always yields the same chunk."""
+    def __init__(self, seed, chunk_size=(10, 10), max_agents=3, cache_size=256):
+        self.seed = seed
+        self.chunk_size = chunk_size
+        self.max_agents = max_agents
+        self.cache_size = cache_size
+        self._cache = OrderedDict()  # (chunk_x, chunk_y) -> generated data, LRU
+        self._lock = threading.Lock()  # load() is also called from the World prefetch thread
+
+    def has(self, chunk_x, chunk_y):
+        return True  # The generated world has no edges
+
+    def load(self, chunk_x, chunk_y):
+        """Return (tiles, room identifier, agents data) for the chunk, generating it if needed."""
+        key = (chunk_x, chunk_y)
+        with self._lock:
+            data = self._cache.get(key)
+            if data is not None:
+                self._cache.move_to_end(key)
+                return data
+
+        data = self.generate(chunk_x, chunk_y)
+
+        with self._lock:
+            self._cache[key] = data
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return data
+
+    def generate(self, chunk_x, chunk_y):
+        """Synthesize a chunk; the string seed keeps results identical across runs and platforms."""
+        rng = random.Random(f"{self.seed}:{chunk_x}:{chunk_y}")
+        width, height = self.chunk_size
+        tiles = bytearray(width * height)  # All floor
+
+        # Walls along the edges with doorways in the middle of each side, so neighbours connect
+        room_identifier = rng.choice(room_identifiers)
+        if room_identifier != "street":
+            door_x, door_y = width // 2, height // 2
+            for col in range(width):
+                if col not in (door_x - 1, door_x):
+                    tiles[col] = 1
+                    tiles[(height - 1) * width + col] = 1
+            for row in range(height):
+                if row not in (door_y - 1, door_y):
+                    tiles[row * width] = 1
+                    tiles[row * width + width - 1] = 1
+
+        # Scatter furniture away from the doorways
+        for _ in range(rng.randint(0, 8)):
+            col, row = rng.randrange(2, width - 2), rng.randrange(2, height - 2)
+            tiles[row * width + col] = 2
+
+        agents_data = []
+        floor_cells = [index for index, tile in enumerate(tiles) if tile == 0]
+        weights = [weight for _, _, _, weight in professions]
+        for _ in range(rng.randint(0, self.max_agents)):
+            if not floor_cells:
+                break
+            row, col = divmod(rng.choice(floor_cells), width)
+            profession, name, dialogue, _ = rng.choices(professions, weights)[0]
+            agent = {
+                "name": name,
+                "type": "human",
+                "profession": profession,
+                "chunk_position": [chunk_x, chunk_y],
+                "tile": [col, row],
+                "tile_offset": [rng.randrange(12, 38), rng.randrange(12, 38)],
+                "detection": 60,
+            }
+            if dialogue:
+                agent["dialogue"] = dialogue
+            agents_data.append(agent)
+
+        return bytes(tiles), room_identifier, agents_data
+
+class LayeredChunkSource:
+    """Chain of chunk sources; the first one that has a chunk wins (hand-authored before generated)."""
+    def __init__(self, *sources):
+        self.sources = sources
+
+    def has(self, chunk_x, chunk_y):
+        return any(source.has(chunk_x, chunk_y) for source in self.sources)
+
+    def load(self, chunk_x, chunk_y):
+        for source in self.sources:
+            data = source.load(chunk_x, chunk_y)
+            if data is not None:
+                return data
+        return None
+
+    def close(self):
+        for source in self.sources:
+            if hasattr(source, "close"):
+                source.close()
@@ -0,0 +1,47 @@
+import os
+import sys
+
+os.environ["SDL_VIDEODRIVER"] = "dummy"
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.realpath(__file__)), "..", "src"))
+
+import pygame
+
+# main parses its arguments and loads the world on import
+saved_argv = sys.argv
+sys.argv = ["main.py", "--windowed", "--dirty-rects", "--new-game", "--autosave", "0"]
+try:
+    import main
+finally:
+    sys.argv = saved_argv
+
+def present_frame(player_pos, camera_offset, presented):
+    main.render(player_pos, camera_offset, main.game_state)
+    main.presenter.present(main.screen)
+    return presented
+
+def test_tile_edit_with_still_camera_is_presented(monkeypatch):
+    presented = []
+    monkeypatch.setattr(pygame.display, "update", lambda rects: presented.extend(rects))
+    monkeypatch.setattr(pygame.display, "flip", lambda: presented.append("flip"))
+
+    player_pos, camera_offset = pygame.Vector2(445, 325), pygame.Vector2(0, 0)
+    present_frame(player_pos, camera_offset, presented)  # First frame is a full redraw
+    present_frame(player_pos, camera_offset, presented)
+    presented.clear()
+
+    # A floor tile on screen, away from the player, the buttons and every NPC
+    agents = [agent.position for chunk in main.world for agent in chunk.agents]
+    tile_point = next(
+        (x + 25, y + 25)
+        for y in range(200, 700, 50) for x in range(700, 1200, 50)
+        if main.world.tile_at((x + 25, y + 25)) is not None
+        and main.world.tile_at((x + 25, y + 25)).tile_type == "floor"
+        and all(abs(position[0] - x - 25) > 60 or abs(position[1] - y - 25) > 60 for position in agents)
+    )
+    assert main.world.set_tile(tile_point, "wall")
+    present_frame(player_pos, camera_offset, presented)
+
+    assert "flip" not in presented
+    screen_point = (tile_point[0] - camera_offset.x, tile_point[1] - camera_offset.y)
+    assert any(rect.collidepoint(screen_point) for rect in presented)
+    assert main.screen.get_at((int(screen_point[0]), int(screen_point[1]))) == pygame.Color("black")